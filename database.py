@@ -1,10 +1,254 @@
+import asyncio
+import queue
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 class BettingDatabase:
-   def __init__(self, db_path='betting_market.db'):
-       self.db_path = db_path
-       # We can add ensure_tables_exist() back if needed
-       
-   def get_connection(self):
-       """Get a connection to the SQLite database"""
-       return sqlite3.connect(self.db_path)
+    def __init__(self, db_path='betting_market.db', readers=4):
+        self.db_path = db_path
+        # One long-lived writer connection; all writes go through it under
+        # _write_lock, so SQLite never sees two writers at once
+        self._conn = self._connect()
+        # Checkpoint the WAL back into the database every ~4 MB of writes
+        self._conn.execute('PRAGMA wal_autocheckpoint=1000')
+        self._write_lock = threading.Lock()
+        self.init_database()
+        # Long-lived read-only connections. Under WAL they read alongside
+        # the writer, and each keeps its own page cache warm between commands.
+        # Kept as a stack, so light traffic keeps reusing the warmest reader
+        self._readers = queue.LifoQueue()
+        for _ in range(readers):
+            reader = self._connect()
+            reader.execute('PRAGMA query_only=ON')
+            self._readers.put(reader)
+        self._reader_count = readers
+        # Bumped whenever markets open, close or go away, so anything
+        # rendered from the open markets can be cached per generation
+        self.markets_generation = 0
+        # Queries run on these workers so SQLite never blocks the event
+        # loop; one worker per reader plus one for the writer
+        self._executor = ThreadPoolExecutor(max_workers=readers + 1, thread_name_prefix='betting-db')
+
+    def _connect(self):
+        """Open a tuned connection to the database file"""
+        # isolation_level=None: statements autocommit unless run inside transaction()
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None, cached_statements=256
+        )
+        # Rows still unpack like tuples but can also be read by column name
+        conn.row_factory = sqlite3.Row
+        self._apply_pragmas(conn)
+        return conn
+
+    @staticmethod
+    def _apply_pragmas(conn):
+        """Tune a freshly opened connection; run once per connection"""
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-64000')  # 64 MB
+        conn.execute('PRAGMA mmap_size=268435456')  # 256 MB
+        conn.execute('PRAGMA foreign_keys=ON')
+        conn.execute('PRAGMA busy_timeout=5000')
+
+    def init_database(self):
+        """Create any missing tables and indexes"""
+        # WAL is a property of the database file and persists, so it only
+        # needs setting here rather than on every connection
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS markets (
+                market_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                title TEXT NOT NULL,
+                description TEXT,
+                creator_id TEXT NOT NULL,
+                resolver_id TEXT,
+                status TEXT DEFAULT 'open',
+                winning_outcome TEXT,
+                close_time TIMESTAMP,
+                discord_message_id TEXT,
+                thread_id TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE TABLE IF NOT EXISTS market_outcomes (
+                outcome_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                market_id INTEGER NOT NULL REFERENCES markets(market_id),
+                outcome_name TEXT NOT NULL
+            );
+
+            CREATE TABLE IF NOT EXISTS bet_offers (
+                bet_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                market_id INTEGER NOT NULL REFERENCES markets(market_id),
+                bettor_id TEXT NOT NULL,
+                outcome TEXT NOT NULL,
+                offer_amount INTEGER NOT NULL,  -- cents
+                ask_amount INTEGER NOT NULL,  -- cents
+                status TEXT DEFAULT 'open',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                target_user_id TEXT,
+                discord_message_id TEXT,
+                bettor_name TEXT
+            );
+
+            CREATE TABLE IF NOT EXISTS accepted_bets (
+                accepted_bet_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                bet_id INTEGER NOT NULL REFERENCES bet_offers(bet_id),
+                acceptor_id TEXT NOT NULL,
+                status TEXT DEFAULT 'active',
+                accepted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                acceptor_name TEXT
+            );
+
+            -- Filter/join columns for listbets, mybets and resolvemarket
+            CREATE INDEX IF NOT EXISTS idx_offers_status_market ON bet_offers(status, market_id);
+            -- Per-market lookups that don't pin status: resolvemarket's join and !rm's delete
+            CREATE INDEX IF NOT EXISTS idx_offers_market_status ON bet_offers(market_id, status);
+            CREATE INDEX IF NOT EXISTS idx_offers_bettor_status ON bet_offers(bettor_id, status);
+            -- Carries bet_id so mybets' acceptor branch never touches the table
+            DROP INDEX IF EXISTS idx_accepted_acceptor;
+            CREATE INDEX IF NOT EXISTS idx_accepted_acceptor_bet ON accepted_bets(acceptor_id, status, bet_id);
+            CREATE INDEX IF NOT EXISTS idx_outcomes_market ON market_outcomes(market_id, outcome_name);
+            -- Nothing looks markets up by creator; the index only slowed inserts
+            DROP INDEX IF EXISTS idx_markets_creator;
+            -- listmarkets reads only the open markets, which resolved ones soon outnumber
+            CREATE INDEX IF NOT EXISTS idx_markets_status ON markets(status);
+
+            -- Reaction dispatch by Discord message
+            DROP INDEX IF EXISTS idx_markets_status_message;
+            CREATE INDEX IF NOT EXISTS idx_markets_message ON markets(discord_message_id)
+                WHERE discord_message_id IS NOT NULL;
+            CREATE INDEX IF NOT EXISTS idx_offers_message ON bet_offers(discord_message_id)
+                WHERE discord_message_id IS NOT NULL;
+        ''')
+
+        # Columns added after the tables were first created
+        self._add_column('bet_offers', 'bettor_name', 'TEXT')
+        self._add_column('accepted_bets', 'acceptor_name', 'TEXT')
+
+        # Covers the accepted_bets side of resolvemarket and mybets; it needs
+        # acceptor_name, so it can only be built once that column exists
+        self._conn.executescript('''
+            DROP INDEX IF EXISTS idx_accepted_bet;
+            CREATE INDEX IF NOT EXISTS idx_accepted_bet_acceptor
+                ON accepted_bets(bet_id, status, acceptor_id, acceptor_name);
+        ''')
+
+        # Version 1 stores bet amounts as integer cents instead of dollars
+        if self._conn.execute('PRAGMA user_version').fetchone()[0] < 1:
+            with self.transaction() as conn:
+                conn.execute('''
+                    UPDATE bet_offers
+                    SET offer_amount = CAST(ROUND(offer_amount * 100) AS INTEGER),
+                        ask_amount = CAST(ROUND(ask_amount * 100) AS INTEGER)
+                ''')
+                conn.execute('PRAGMA user_version = 1')
+
+    def _add_column(self, table, column, definition):
+        """Add a column to an existing table unless it is already there"""
+        columns = {row[1] for row in self._conn.execute(f'PRAGMA table_info({table})')}
+        if column not in columns:
+            self._conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+    @contextmanager
+    def get_connection(self):
+        """Check out a read-only connection from the pool.
+
+        Blocks until a reader is free and returns it to the pool afterwards.
+        Use transaction() or execute() for writes.
+        """
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of writes as a single BEGIN IMMEDIATE transaction.
+
+        The write lock is taken up front, so the block never has to upgrade
+        a read lock mid-way. Commits on success and rolls back if the block
+        raises. Never await inside the block: it holds the writer.
+        """
+        with self._write_lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def _read(self, sql, params, fetch):
+        """Run one query on a pooled reader and fetch its rows"""
+        with self.get_connection() as conn:
+            return fetch(conn.execute(sql, params))
+
+    def _write(self, sql, params):
+        """Run one autocommitted statement on the writer"""
+        with self._write_lock:
+            return self._conn.execute(sql, params)
+
+    async def run(self, func, *args):
+        """Run a blocking database function on a database thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def fetchone(self, sql, params=()):
+        """Run a query on a pooled reader and return its first row"""
+        return await self.run(self._read, sql, params, sqlite3.Cursor.fetchone)
+
+    async def fetchall(self, sql, params=()):
+        """Run a query on a pooled reader and return all rows"""
+        return await self.run(self._read, sql, params, sqlite3.Cursor.fetchall)
+
+    async def execute(self, sql, params=()):
+        """Run a single autocommitted write on the writer connection.
+
+        Returns the cursor so callers can read lastrowid or rowcount.
+        """
+        return await self.run(self._write, sql, params)
+
+    def markets_changed(self):
+        """Invalidate anything cached from the list of open markets"""
+        self.markets_generation += 1
+
+    def optimize(self):
+        """Let SQLite refresh query planner statistics if they look stale.
+
+        PRAGMA optimize only weighs the queries run on its own connection,
+        and most queries run on the readers, so each reader gets a turn too,
+        with writes briefly allowed so it can store the new statistics.
+        """
+        with self._write_lock:
+            self._conn.execute('PRAGMA optimize')
+            # Take every reader out of the pool so none is in use meanwhile
+            readers = [self._readers.get() for _ in range(self._reader_count)]
+            try:
+                for reader in readers:
+                    reader.execute('PRAGMA query_only=OFF')
+                    try:
+                        reader.execute('PRAGMA optimize')
+                    finally:
+                        reader.execute('PRAGMA query_only=ON')
+            finally:
+                for reader in readers:
+                    self._readers.put(reader)
+
+    def checkpoint(self):
+        """Copy the WAL into the database and truncate it.
+
+        Returns (busy, wal_pages, checkpointed_pages) from SQLite.
+        """
+        with self._write_lock:
+            return tuple(self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone())
+
+    def close(self):
+        """Finish queued work, then optimize and close every connection"""
+        self._executor.shutdown(wait=True)
+        self.optimize()
+        for _ in range(self._reader_count):
+            self._readers.get().close()
+        self._conn.close()
@@ -1,23 +1,27 @@
 import os
-import sqlite3
-from decimal import Decimal
 from dotenv import load_dotenv
 import discord
-from discord.ext import commands
-from discord.ui import Select, View
+from discord.ext import commands, tasks
 import asyncio
-import datetime
-import re
-import pytz
+import contextlib
+import functools
+import time
+from collections import OrderedDict
 
 from database import BettingDatabase
-from market import Market
-from views import BetView, OutcomeSelect
+from market import Market, cancel_countdown, format_money, BETTOR_LOOKUP_SQL, DENNIS_EMOJI_ID, MONKAS_EMOJI_ID
+from views import PageView
 
 # Load environment variables
 load_dotenv()
 TOKEN = os.getenv('DISCORD_BOT_TOKEN')
 
+# Fetched users kept around for an hour, least recently used dropped first
+USER_CACHE_SIZE = 4096
+USER_CACHE_TTL = 3600
+# Most user fetches in flight at once, shared by every command
+USER_FETCH_CONCURRENCY = 8
+
 class BettingBot(commands.Bot):
     def __init__(self):
         intents = discord.Intents.default()
@@ -25,56 +29,116 @@ class BettingBot(commands.Bot):
         intents.reactions = True
         super().__init__(command_prefix='!', intents=intents)
         self.db = BettingDatabase()
+        # Users fetched over the API; without the members intent most users
+        # never make it into discord.py's own cache. Maps ID -> (user, expiry)
+        self._user_cache = OrderedDict()
+        # Keeps a big batch of cache misses from tripping Discord's rate limits
+        self._user_fetch_limit = asyncio.Semaphore(USER_FETCH_CONCURRENCY)
+        # Background user preload, started in setup_hook
+        self._preload_task = None
         
     async def setup_hook(self):
         print(f'Setting up {self.user} (ID: {self.user.id})')
         
-        # Initialize active markets and bets dictionaries
-        self.active_markets = {}
-        self.active_bets = {}
-        
-        # Load active markets
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get all open markets
-            cursor.execute('''
-                SELECT market_id, discord_message_id, title, thread_id, creator_id
-                FROM markets 
-                WHERE status = 'open' 
-                AND discord_message_id IS NOT NULL
-            ''')
-            open_markets = cursor.fetchall()
-            
-            for market_id, message_id, title, thread_id, creator_id in open_markets:
-                # Get market options
-                cursor.execute('''
-                    SELECT outcome_name 
-                    FROM market_outcomes 
-                    WHERE market_id = ?
-                ''', (market_id,))
-                options = [row[0] for row in cursor.fetchall()]
-                
-                # Create Market object and store in active_markets
-                market = Market(market_id, title, options, creator_id, message_id, thread_id)
-                market.db = self.db
-                self.active_markets[int(message_id)] = market.to_dict()
-                print(f"Loaded active market: {title}")
-                
-            # Get all open bet offers with their message IDs
-            cursor.execute('''
-                SELECT bet_id, discord_message_id 
-                FROM bet_offers 
-                WHERE status = 'open' 
-                AND discord_message_id IS NOT NULL
-            ''')
-            open_bets = cursor.fetchall()
-            
-            for bet_id, message_id in open_bets:
-                self.active_bets[int(message_id)] = bet_id
-                print(f"Loaded active bet: {bet_id}")
-                
-        print(f"Loaded {len(self.active_markets)} active markets and {len(self.active_bets)} active bets")
+        self.optimize_database.start()
+        self.checkpoint_database.start()
+        # Warm the user cache in the background so startup isn't held up
+        self._preload_task = asyncio.create_task(self.preload_users())
+
+    async def preload_users(self):
+        """Fetch the users that listings of live bets would otherwise look up"""
+        # Only bets placed before names were stored need a lookup
+        rows = await self.db.fetchall('''
+            SELECT bettor_id AS user_id
+            FROM bet_offers
+            WHERE status IN ('open', 'accepted') AND bettor_name IS NULL
+            UNION
+            SELECT acceptor_id
+            FROM accepted_bets
+            WHERE status = 'active' AND acceptor_name IS NULL
+        ''')
+        if rows:
+            users = await self.fetch_users([row['user_id'] for row in rows])
+            print(f"Preloaded {sum(user is not None for user in users.values())} users")
+
+    @tasks.loop(hours=6)
+    async def optimize_database(self):
+        """Periodically refresh SQLite's query planner statistics"""
+        await self.db.run(self.db.optimize)
+
+    @tasks.loop(minutes=5)
+    async def checkpoint_database(self):
+        """Keep the WAL file from growing between SQLite's own checkpoints"""
+        busy, wal_pages, checkpointed = await self.db.run(self.db.checkpoint)
+        # Stay quiet while idle; only report a busy or non-empty WAL
+        if busy or wal_pages:
+            print(f"WAL checkpoint: {checkpointed}/{wal_pages} pages{' (busy)' if busy else ''}")
+
+    def cached_user(self, user_id, guild=None):
+        """Return a user from discord.py's caches or ours, without any API call"""
+        user = (guild and guild.get_member(user_id)) or self.get_user(user_id)
+        if user is not None:
+            return user
+        entry = self._user_cache.get(user_id)
+        if entry is None:
+            return None
+        user, expires = entry
+        if expires < time.monotonic():
+            # Stale: names and avatars change, so fetch it again
+            del self._user_cache[user_id]
+            return None
+        self._user_cache.move_to_end(user_id)
+        return user
+
+    def _remember_user(self, user_id, user):
+        """Cache a fetched user, evicting the least recently used past the limit"""
+        self._user_cache[user_id] = (user, time.monotonic() + USER_CACHE_TTL)
+        self._user_cache.move_to_end(user_id)
+        if len(self._user_cache) > USER_CACHE_SIZE:
+            self._user_cache.popitem(last=False)
+
+    async def lookup_user(self, user_id):
+        """Resolve a user ID, only hitting the API on a cache miss"""
+        user = self.cached_user(user_id)
+        if user is None:
+            user = await self._fetch_user_limited(user_id)
+            self._remember_user(user_id, user)
+        return user
+
+    async def _fetch_user_limited(self, user_id):
+        """Fetch a user over the API, waiting for a free fetch slot"""
+        async with self._user_fetch_limit:
+            return await self.fetch_user(user_id)
+
+    async def fetch_users(self, user_ids, guild=None):
+        """Resolve user IDs to users, fetching cache misses concurrently.
+
+        Members already cached for guild are used before anything else.
+        """
+        users = {uid: self.cached_user(uid, guild) for uid in {int(uid) for uid in user_ids}}
+        missing = [uid for uid, user in users.items() if user is None]
+        fetched = await asyncio.gather(*(self._fetch_user_limited(uid) for uid in missing), return_exceptions=True)
+        for uid, user in zip(missing, fetched):
+            if isinstance(user, BaseException):
+                users[uid] = None
+            else:
+                users[uid] = user
+                self._remember_user(uid, user)
+        return users
+
+    async def close(self):
+        # Stop the preload before the client and database it uses go away
+        if self._preload_task and not self._preload_task.done():
+            self._preload_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._preload_task
+        self.optimize_database.cancel()
+        self.checkpoint_database.cancel()
+        await super().close()
+        # Closing waits for queued queries and runs PRAGMA optimize, so keep
+        # it off the event loop. It shuts down the database executor itself,
+        # so it runs on the default one rather than through db.run
+        await asyncio.to_thread(self.db.close)
 
 bot = BettingBot()
 
@@ -106,62 +170,59 @@ async def create_market(ctx, *, market_details):
     market = await Market.create(bot.db, title, options, str(ctx.author.id))
     
     # Create message and thread
-    message, thread = await market.create_message(ctx.channel, ctx.author.name)
-    
-    # Store in active_markets
-    bot.active_markets[message.id] = market.to_dict()
+    await market.create_message(ctx.channel, ctx.author.name)
+
+# Reaction handlers for market messages and for bet messages, keyed by the
+# emoji's ID for server emoji or its character otherwise (see reaction_key).
+# Each is called as handler(market, message, user, emoji, bet_id).
+MARKET_REACTIONS = {
+    DENNIS_EMOJI_ID: lambda market, message, user, emoji, bet_id: market.handle_bet_offer_reaction(message, user, bot),
+    "🇷": lambda market, message, user, emoji, bet_id: market.handle_set_resolver(message, user, bot),
+    "⏲️": lambda market, message, user, emoji, bet_id: market.handle_set_timer(message, user, bot),
+    "🆘": lambda market, message, user, emoji, bet_id: Market.handle_react_help(message),
+}
+
+BET_REACTIONS = {
+    "✅": lambda market, message, user, emoji, bet_id: market.handle_bet_acceptance(message, user, bet_id),
+    "❔": lambda market, message, user, emoji, bet_id: market.handle_bet_explanation(message, user, bet_id),
+    "❌": lambda market, message, user, emoji, bet_id: market.handle_bet_cancellation(message, user, bet_id),
+    "🆘": lambda market, message, user, emoji, bet_id: market.handle_bet_react_help(message),
+}
+for feedback_emoji in ["📉", "🤏", MONKAS_EMOJI_ID]:
+    BET_REACTIONS[feedback_emoji] = lambda market, message, user, emoji, bet_id: market.handle_bet_reaction_feedback(message, user, reaction_key(emoji), bet_id)
+
+HANDLED_REACTIONS = MARKET_REACTIONS.keys() | BET_REACTIONS.keys()
+
+def reaction_key(emoji):
+    """Key a PartialEmoji for the handler tables without formatting it"""
+    return emoji.id or emoji.name
 
 @bot.event
 async def on_raw_reaction_add(payload):
-    if payload.user_id == bot.user.id:
+    emoji = payload.emoji
+    key = reaction_key(emoji)
+    # Most reactions in the server aren't ours; skip them without any I/O
+    if payload.user_id == bot.user.id or key not in HANDLED_REACTIONS:
         return
         
-    channel = bot.get_channel(payload.channel_id)
-    message = await channel.fetch_message(payload.message_id)
-    user = await bot.fetch_user(payload.user_id)
+    # Find the market (and bet, for bet messages) this message belongs to
+    market, bet_id = await Market.from_message(bot.db, payload.message_id)
+    if market is None:
+        return
+
+    handler = (MARKET_REACTIONS if bet_id is None else BET_REACTIONS).get(key)
+    if handler is None:
+        return
+
+    # Threads drop out of the cache once archived, so fall back to the API
+    channel = bot.get_channel(payload.channel_id) or await bot.fetch_channel(payload.channel_id)
+    # Handlers only need the message's ID and channel to reply, edit or react;
+    # the few that read its embed fetch it themselves
+    message = channel.get_partial_message(payload.message_id)
+    # Guild reactions carry the member, so the API is only needed in DMs
+    user = payload.member or await bot.lookup_user(payload.user_id)
     
-    if message.id in bot.active_markets:
-        market_data = bot.active_markets[message.id]
-        market = Market.from_dict(market_data, bot.db)
-        
-        if str(payload.emoji) == "<:dennis:1328277972612026388>":
-            await market.handle_bet_offer_reaction(message, user, bot)
-        elif str(payload.emoji) == "🇷":
-            await market.handle_set_resolver(message, user, bot)
-        elif str(payload.emoji) == "⏲️":
-            await market.handle_set_timer(message, user, bot)
-        elif str(payload.emoji) == "🆘":
-            await Market.handle_react_help(message)
-            
-    # bets
-    elif message.id in bot.active_bets:
-        bet_id = bot.active_bets[message.id]
-        # Get market_id from bet_offers table
-        with bot.db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT market_id FROM bet_offers WHERE bet_id = ?', (bet_id,))
-            result = cursor.fetchone()
-            if result:
-                market_id = result[0]
-                # Look up market data from active_markets using market_id
-                market_data = None
-                for m in bot.active_markets.values():
-                    if m['market_id'] == market_id:
-                        market_data = m
-                        break
-                
-                if market_data:
-                    market = Market.from_dict(market_data, bot.db)
-                    if str(payload.emoji) == "✅":
-                        await market.handle_bet_acceptance(message, user, bet_id)
-                    elif str(payload.emoji) == "❔":
-                        await market.handle_bet_explanation(message, user, bet_id)
-                    elif str(payload.emoji) == "❌":
-                        await market.handle_bet_cancellation(message, user, bet_id)
-                    elif str(payload.emoji) == "🆘":
-                        await market.handle_bet_react_help(message)
-                    elif str(payload.emoji) in ["📉", "🤏", "<:monkaS:814271443327123466>"]:
-                        await market.handle_bet_reaction_feedback(message, user, str(payload.emoji), bet_id)
+    await handler(market, message, user, emoji, bet_id)
 
 @bot.command(name='offerbet')
 async def offer_bet(ctx, market_id: int, outcome: str, offer: float, ask: float, target_user: discord.Member = None):
@@ -177,24 +238,26 @@ async def cancel_bet(ctx, bet_id: int):
     Cancel an open bet offer by removing it
     Usage: !cancelbet <bet_id>
     """
-    with bot.db.get_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Verify bet exists and user owns it
-        cursor.execute('SELECT bettor_id FROM bet_offers WHERE bet_id = ?', (bet_id,))
-        bet = cursor.fetchone()
-        
+    # Remove the bet offer if the user owns it and it is still open
+    def delete_bet():
+        with bot.db.transaction() as conn:
+            return conn.execute(
+                "DELETE FROM bet_offers WHERE bet_id = ? AND bettor_id = ? AND status = 'open' RETURNING market_id",
+                (bet_id, str(ctx.author.id))
+            ).fetchone()
+
+    deleted = await bot.db.run(delete_bet)
+    
+    if deleted is None:
+        # Slow path: look the bet up only to explain the failure
+        bet = await bot.db.fetchone(BETTOR_LOOKUP_SQL, (bet_id,))
         if not bet:
             await ctx.send("Bet offer not found.")
-            return
-            
-        if str(ctx.author.id) != bet[0]:
+        elif str(ctx.author.id) != bet['bettor_id']:
             await ctx.send("You can only cancel your own bet offers.")
-            return
-        
-        # Remove the bet offer
-        cursor.execute('DELETE FROM bet_offers WHERE bet_id = ?', (bet_id,))
-        conn.commit()
+        else:
+            await ctx.send("This bet can no longer be cancelled.")
+        return
     
     embed = discord.Embed(
         title="Bet Offer Cancelled",
@@ -202,37 +265,36 @@ async def cancel_bet(ctx, bet_id: int):
         color=discord.Color.red()
     )
     
-    await update_market_stats(message, market_data['market_id'])
     await ctx.send(embed=embed)
 
+@functools.lru_cache(maxsize=1)
+def render_market_list(generation):
+    """Render the !listmarkets messages, cached until the open markets change"""
+    with bot.db.get_connection() as conn:
+        markets = conn.execute('''
+            SELECT market_id, title
+            FROM markets
+            WHERE status = 'open'
+        ''').fetchall()
+
+    results = [f"{title} [{market_id}]\n" for market_id, title in markets]
+
+    # Split results into chunks of 5
+    return tuple(''.join(results[i:i+5]) for i in range(0, len(results), 5))
+
 @bot.command(name='listmarkets')
 async def list_markets(ctx):
     """List all active betting markets"""
-    with bot.db.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT m.market_id, m.title, GROUP_CONCAT(mo.outcome_name, ', ') as outcomes
-            FROM markets m
-            JOIN market_outcomes mo ON m.market_id = mo.market_id
-            WHERE m.status = 'open'
-            GROUP BY m.market_id
-        ''')
-        markets = cursor.fetchall()
+    chunks = await bot.db.run(render_market_list, bot.db.markets_generation)
     
-    if not markets:
+    if not chunks:
         await ctx.send("No active betting markets at the moment.")
         return
 
-    results = []
-    for market_id, title, outcomes in markets:
-        results.append(f"{title} [{market_id}]\n")
-
-    # Split results into chunks of 5 and store sent messages
+    # Send each chunk and store sent messages
     messages = []
-    for i in range(0, len(results), 5):
-        chunk = results[i:i+5]
-        final_result = ''.join(chunk)
-        message = await ctx.send(final_result)
+    for chunk in chunks:
+        message = await ctx.send(chunk)
         messages.append(message)
     
     # Wait 60 seconds (1 minute) then delete all messages
@@ -243,59 +305,67 @@ async def list_markets(ctx):
         except discord.errors.NotFound:
             pass  # Message already deleted
 
-@bot.command(name='listbets')
-async def list_bets(ctx, market_id: int = None):
-    """
-    List all open bet offers, optionally filtered by market
-    Usage: !listbets [market_id]
+# Discord allows 25 fields per embed; listbets shows one field per bet
+LIST_BETS_PAGE_SIZE = 20
+
+async def render_bets_page(market_id, page, guild=None):
+    """Build the embed for one page of open bet offers.
+
+    Returns (embed, has_more); embed is None when the page is empty.
     """
-    with bot.db.get_connection() as conn:
-        cursor = conn.cursor()
-        
-        if market_id:
-            cursor.execute('''
-                SELECT bo.bet_id, m.title, bo.outcome, bo.offer_amount, bo.ask_amount, 
-                       bo.bettor_id, bo.target_user_id
-                FROM bet_offers bo
-                JOIN markets m ON bo.market_id = m.market_id
-                WHERE bo.status = 'open' AND bo.market_id = ?
-            ''', (market_id,))
-        else:
-            cursor.execute('''
-                SELECT bo.bet_id, m.title, bo.outcome, bo.offer_amount, bo.ask_amount,
-                       bo.bettor_id, bo.target_user_id
-                FROM bet_offers bo
-                JOIN markets m ON bo.market_id = m.market_id
-                WHERE bo.status = 'open'
-            ''')
-        
-        bets = cursor.fetchall()
+    # One extra row tells us whether there is a next page
+    limit, offset = LIST_BETS_PAGE_SIZE + 1, page * LIST_BETS_PAGE_SIZE
+    if market_id:
+        bets = await bot.db.fetchall('''
+            SELECT bo.bet_id, m.title, bo.outcome, bo.offer_amount, bo.ask_amount, 
+                   bo.bettor_id, bo.target_user_id, bo.bettor_name
+            FROM bet_offers bo
+            JOIN markets m ON bo.market_id = m.market_id
+            WHERE bo.status = 'open' AND bo.market_id = ?
+            ORDER BY bo.bet_id
+            LIMIT ? OFFSET ?
+        ''', (market_id, limit, offset))
+    else:
+        bets = await bot.db.fetchall('''
+            SELECT bo.bet_id, m.title, bo.outcome, bo.offer_amount, bo.ask_amount,
+                   bo.bettor_id, bo.target_user_id, bo.bettor_name
+            FROM bet_offers bo
+            JOIN markets m ON bo.market_id = m.market_id
+            WHERE bo.status = 'open'
+            ORDER BY bo.bet_id
+            LIMIT ? OFFSET ?
+        ''', (limit, offset))
     
     if not bets:
-        await ctx.send("No open bet offers found.")
-        return
+        return None, False
+
+    has_more = len(bets) > LIST_BETS_PAGE_SIZE
+    bets = bets[:LIST_BETS_PAGE_SIZE]
     
     embed = discord.Embed(title="Open Bet Offers", color=discord.Color.gold())
+    embed.set_footer(text=f"Page {page + 1}")
     
-    for bet_id, title, outcome, offer, ask, bettor_id, target_user_id in bets:
+    # Offers made before names were stored still need a lookup
+    users = await bot.fetch_users([bet['bettor_id'] for bet in bets if not bet['bettor_name']], guild)
+    
+    for bet_id, title, outcome, offer, ask, bettor_id, target_user_id, bettor_name in bets:
         # Get bettor's name
-        bettor = await bot.fetch_user(int(bettor_id))
-        bettor_name = bettor.name if bettor else "Unknown User"
+        if not bettor_name:
+            bettor = users[int(bettor_id)]
+            bettor_name = bettor.name if bettor else "Unknown User"
         
         # Build bet description
         description = [
             f"Market: {title}",
             f"Outcome: {outcome}",
             f"Offered by: {bettor_name}",
-            f"Risk: ${offer}",
-            f"To Win: ${ask}"
+            f"Risk: {format_money(offer)}",
+            f"To Win: {format_money(ask)}"
         ]
         
         # Add target user info if present
         if target_user_id:
-            target_user = await bot.fetch_user(int(target_user_id))
-            if target_user:
-                description.append(f"Offered to: {target_user.mention}")
+            description.append(f"Offered to: <@{target_user_id}>")
         
         embed.add_field(
             name=f"Bet ID: {bet_id}",
@@ -303,7 +373,36 @@ async def list_bets(ctx, market_id: int = None):
             inline=False
         )
     
-    await ctx.send(embed=embed)
+    return embed, has_more
+
+@bot.command(name='listbets')
+async def list_bets(ctx, market_id: int = None):
+    """
+    List all open bet offers, optionally filtered by market
+    Usage: !listbets [market_id]
+    """
+    embed, has_more = await render_bets_page(market_id, 0, ctx.guild)
+    
+    if embed is None:
+        await ctx.send("No open bet offers found.")
+        return
+    
+    if not has_more:
+        await ctx.send(embed=embed)
+        return
+
+    async def render_page(page):
+        embed, has_more = await render_bets_page(market_id, page, ctx.guild)
+        if embed is None:
+            embed = discord.Embed(
+                title="Open Bet Offers",
+                description="No more open bet offers.",
+                color=discord.Color.gold()
+            )
+        return embed, has_more
+
+    view = PageView(ctx.author, render_page, has_more)
+    view.message = await ctx.send(embed=embed, view=view)
 
 @bot.command(name='resolvemarket')
 async def resolve_market(ctx, market_id: int, *, winning_outcome: str):
@@ -312,87 +411,92 @@ async def resolve_market(ctx, market_id: int, *, winning_outcome: str):
     Usage: !resolvemarket <market_id> <winning_outcome>
     Only the market creator or designated resolver can resolve markets.
     """
-    with bot.db.get_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Check if market exists and user is authorized
-        cursor.execute('''
-            SELECT title, status, creator_id, resolver_id
-            FROM markets
-            WHERE market_id = ?
-        ''', (market_id,))
-        market = cursor.fetchone()
-        
-        if not market:
-            await ctx.send("Market not found.")
-            return
-        
-        title, status, creator_id, resolver_id = market
+    # Check if market exists and user is authorized, and whether the
+    # outcome is one of the market's, in a single lookup
+    market = await bot.db.fetchone('''
+        SELECT title, status, creator_id, resolver_id,
+               EXISTS(
+                   SELECT 1 
+                   FROM market_outcomes 
+                   WHERE market_id = m.market_id AND outcome_name = ?
+               ) AS valid_outcome
+        FROM markets m
+        WHERE market_id = ?
+    ''', (winning_outcome, market_id))
+    
+    if not market:
+        await ctx.send("Market not found.")
+        return
+    
+    title, status, creator_id, resolver_id, valid_outcome = market
 
-        # Verify the user is either the creator or resolver
-        if creator_id is not None and resolver_id is not None:
-            if str(ctx.author.id) != str(creator_id) and str(ctx.author.id) != str(resolver_id):
-                await ctx.send("Only the market creator or designated resolver can resolve this market.")
-                return
-        
-        if status == 'resolved':
-            await ctx.send("This market has already been resolved.")
+    # Verify the user is either the creator or resolver
+    if creator_id is not None and resolver_id is not None:
+        if str(ctx.author.id) != str(creator_id) and str(ctx.author.id) != str(resolver_id):
+            await ctx.send("Only the market creator or designated resolver can resolve this market.")
             return
-        
-        # Verify the outcome is valid for this market
-        cursor.execute('''
-            SELECT outcome_name 
-            FROM market_outcomes 
-            WHERE market_id = ? AND outcome_name = ?
-        ''', (market_id, winning_outcome))
-        
-        if not cursor.fetchone():
-            await ctx.send(f"'{winning_outcome}' is not a valid outcome for this market.")
-            return
-        
-        # Update market status
-        cursor.execute('''
-            UPDATE markets 
-            SET status = 'resolved', 
-                winning_outcome = ?
-            WHERE market_id = ?
-        ''', (winning_outcome, market_id))
-        
-        # Get all accepted bets for this market
-        cursor.execute('''
-            SELECT 
-                bo.bet_id,
-                bo.bettor_id,
-                ab.acceptor_id,
-                bo.outcome,
-                bo.offer_amount,
-                bo.ask_amount
-            FROM bet_offers bo
-            JOIN accepted_bets ab ON bo.bet_id = ab.bet_id
-            WHERE bo.market_id = ? AND ab.status = 'active'
-        ''', (market_id,))
-        
-        active_bets = cursor.fetchall()
-        
-        # Update accepted bets to completed
-        cursor.execute('''
-            UPDATE accepted_bets
-            SET status = 'completed'
-            WHERE bet_id IN (
-                SELECT bet_id 
-                FROM bet_offers 
-                WHERE market_id = ?
-            )
-        ''', (market_id,))
-        
-        # Cancel any open offers
-        cursor.execute('''
-            UPDATE bet_offers
-            SET status = 'cancelled'
-            WHERE market_id = ? AND status = 'open'
-        ''', (market_id,))
-        
-        conn.commit()
+    
+    if status == 'resolved':
+        await ctx.send("This market has already been resolved.")
+        return
+    
+    # Verify the outcome is valid for this market
+    if not valid_outcome:
+        await ctx.send(f"'{winning_outcome}' is not a valid outcome for this market.")
+        return
+    
+    def resolve():
+        with bot.db.transaction() as conn:
+            # Update market status, unless someone resolved it since the check above
+            cursor = conn.execute('''
+                UPDATE markets 
+                SET status = 'resolved', 
+                    winning_outcome = ?
+                WHERE market_id = ? AND status != 'resolved'
+            ''', (winning_outcome, market_id))
+            already_resolved = cursor.rowcount == 0
+        
+            # Get all accepted bets for this market
+            active_bets = conn.execute('''
+                SELECT 
+                    bo.bet_id,
+                    bo.bettor_id,
+                    ab.acceptor_id,
+                    bo.outcome,
+                    bo.offer_amount,
+                    bo.ask_amount,
+                    bo.bettor_name,
+                    ab.acceptor_name
+                FROM bet_offers bo
+                JOIN accepted_bets ab ON bo.bet_id = ab.bet_id
+                WHERE bo.market_id = ? AND ab.status = 'active'
+            ''', (market_id,)).fetchall()
+        
+            # Complete the accepted bets just fetched and cancel any open offers,
+            # committing together with the market update above. The bet IDs
+            # are already in hand, so there is no need to scan bet_offers again.
+            conn.executemany('''
+                UPDATE accepted_bets
+                SET status = 'completed'
+                WHERE bet_id = ? AND status = 'active'
+            ''', ((bet['bet_id'],) for bet in active_bets))
+        
+            conn.execute('''
+                UPDATE bet_offers
+                SET status = 'cancelled'
+                WHERE market_id = ? AND status = 'open'
+            ''', (market_id,))
+
+            return already_resolved, active_bets
+
+    already_resolved, active_bets = await bot.db.run(resolve)
+    bot.db.markets_changed()
+    # A resolved market has no deadline left to warn about or close at
+    cancel_countdown(market_id)
+    
+    if already_resolved:
+        await ctx.send("This market has already been resolved.")
+        return
     
     # Create resolution announcement embed
     embed = discord.Embed(
@@ -403,12 +507,21 @@ async def resolve_market(ctx, market_id: int, *, winning_outcome: str):
     
     # Add bet resolution details
     if active_bets:
-        results_text = ""
-        for bet_id, bettor_id, acceptor_id, outcome, offer_amount, ask_amount in active_bets:
-            bettor = await bot.fetch_user(int(bettor_id))
-            acceptor = await bot.fetch_user(int(acceptor_id))
-            bettor_name = bettor.name if bettor else "Unknown User"
-            acceptor_name = acceptor.name if acceptor else "Unknown User"
+        # Bets made before names were stored still need a lookup
+        users = await bot.fetch_users(
+            [bet['bettor_id'] for bet in active_bets if not bet['bettor_name']] +
+            [bet['acceptor_id'] for bet in active_bets if not bet['acceptor_name']],
+            ctx.guild
+        )
+        
+        results = []
+        for bet_id, bettor_id, acceptor_id, outcome, offer_amount, ask_amount, bettor_name, acceptor_name in active_bets:
+            if not bettor_name:
+                bettor = users[int(bettor_id)]
+                bettor_name = bettor.name if bettor else "Unknown User"
+            if not acceptor_name:
+                acceptor = users[int(acceptor_id)]
+                acceptor_name = acceptor.name if acceptor else "Unknown User"
             
             # Determine winner
             if outcome == winning_outcome:
@@ -420,13 +533,15 @@ async def resolve_market(ctx, market_id: int, *, winning_outcome: str):
                 loser = bettor_name
                 win_amount = offer_amount
             
-            results_text += f"**Bet ID {bet_id}**\n"
-            results_text += f"🏆 {winner} wins ${win_amount}\n"
-            results_text += f"💸 {loser} loses their stake\n\n"
+            results.append(
+                f"**Bet ID {bet_id}**\n"
+                f"🏆 {winner} wins {format_money(win_amount)}\n"
+                f"💸 {loser} loses their stake\n\n"
+            )
         
         embed.add_field(
             name="Bet Resolutions",
-            value=results_text,
+            value="".join(results),
             inline=False
         )
 
@@ -434,19 +549,19 @@ async def resolve_market(ctx, market_id: int, *, winning_outcome: str):
     
     await ctx.send(embed=embed)
 
-async def get_market_recreation_info(cursor, market_id):
+async def get_market_recreation_info(market_id):
     """Get detailed market info for recreation purposes"""
     # Get market outcomes
-    cursor.execute('''
+    rows = await bot.db.fetchall('''
         SELECT outcome_name
         FROM market_outcomes
         WHERE market_id = ?
         ORDER BY outcome_id
     ''', (market_id,))
-    outcomes = [row[0] for row in cursor.fetchall()]
+    outcomes = [row['outcome_name'] for row in rows]
     
     # Get active bets with acceptor info
-    cursor.execute('''
+    bets = await bot.db.fetchall('''
         SELECT 
             b.bettor_id, 
             b.outcome, 
@@ -460,7 +575,6 @@ async def get_market_recreation_info(cursor, market_id):
         WHERE b.market_id = ? AND b.status != 'cancelled'
         ORDER BY b.created_at
     ''', (market_id,))
-    bets = cursor.fetchall()
     
     # Format the recreation message
     info = ["**Market Recreation Info:**"]
@@ -472,7 +586,7 @@ async def get_market_recreation_info(cursor, market_id):
         info.append("\nExisting Bets:")
         for bet in bets:
             bettor_id, outcome, offer, ask, target_id, status, acceptor_id = bet
-            bet_info = f"• <@{bettor_id}> on '{outcome}': ${offer} to win ${ask}"
+            bet_info = f"• <@{bettor_id}> on '{outcome}': {format_money(offer)} to win {format_money(ask)}"
             if target_id:
                 bet_info += f" (offered to <@{target_id}>)"
             if status == 'accepted' and acceptor_id:
@@ -490,83 +604,97 @@ async def get_market_link(ctx, market_id: str):
         await ctx.send("Please provide a valid market ID number.")
         return
         
-    with bot.db.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT message_id, thread_id, title
-            FROM markets 
-            WHERE market_id = ?
-        ''', (market_id,))
-        result = cursor.fetchone()
+    result = await bot.db.fetchone('''
+        SELECT discord_message_id, thread_id, title
+        FROM markets 
+        WHERE market_id = ?
+    ''', (market_id,))
+    
+    if not result:
+        await ctx.send(f"Market {market_id} not found.")
+        return
         
-        if not result:
-            await ctx.send(f"Market {market_id} not found.")
-            return
-            
-        message_id, thread_id, title = result
-        print(f"Found market {market_id} in DB:")
-        print(f"message_id: {message_id}")
-        print(f"thread_id: {thread_id}")
-        print(f"title: {title}")
+    message_id, thread_id, title = result
+    print(f"Found market {market_id} in DB:")
+    print(f"message_id: {message_id}")
+    print(f"thread_id: {thread_id}")
+    print(f"title: {title}")
+    
+    if not message_id and not thread_id:
+        # Get recreation info
+        recreation_info = await get_market_recreation_info(market_id)
+        await ctx.send(
+            f"Market {market_id} ({title}) is a legacy market with no stored message.\n"
+            f"Please use !createmarket to recreate it if needed.\n\n{recreation_info}"
+        )
+        return
         
-        if not message_id and not thread_id:
-            # Get recreation info
-            recreation_info = await get_market_recreation_info(cursor, market_id)
-            await ctx.send(
-                f"Market {market_id} ({title}) is a legacy market with no stored message.\n"
-                f"Please use !createmarket to recreate it if needed.\n\n{recreation_info}"
-            )
-            return
+    try:
+        # Try using thread_id first if available
+        if thread_id:
+            print(f"Attempting to fetch thread {thread_id}")
+            thread = await ctx.guild.fetch_channel(int(thread_id))
+            print(f"Got thread: {thread}")
             
-        try:
-            # Try using thread_id first if available
-            if thread_id:
-                print(f"Attempting to fetch thread {thread_id}")
-                thread = await ctx.guild.fetch_channel(int(thread_id))
-                print(f"Got thread: {thread}")
-                
-                # Explicitly fetch the starter message
+            # Explicitly fetch the starter message
+            try:
+                starter_message = await thread.parent.fetch_message(thread.id)
+                print(f"Got starter message: {starter_message.id}")
+                link = f"https://discord.com/channels/{ctx.guild.id}/{thread.parent.id}/{starter_message.id}"
+                await ctx.send(f"Market {market_id} ({title}): {link}")
+                return
+            except discord.NotFound:
+                print("Could not fetch starter message")
+        
+        # Fallback to message_id if thread approach failed
+        if message_id:
+            print(f"Trying to find message {message_id} in channels")
+            found = False
+            for channel in ctx.guild.text_channels:
+                print(f"Searching channel: {channel.name}")
                 try:
-                    starter_message = await thread.parent.fetch_message(thread.id)
-                    print(f"Got starter message: {starter_message.id}")
-                    link = f"https://discord.com/channels/{ctx.guild.id}/{thread.parent.id}/{starter_message.id}"
-                    await ctx.send(f"Market {market_id} ({title}): {link}")
-                    return
+                    message = await channel.fetch_message(int(message_id))
+                    if message:
+                        link = f"https://discord.com/channels/{ctx.guild.id}/{channel.id}/{message.id}"
+                        await ctx.send(f"Market {market_id} ({title}): {link}")
+                        found = True
+                        break
                 except discord.NotFound:
-                    print("Could not fetch starter message")
-            
-            # Fallback to message_id if thread approach failed
-            if message_id:
-                print(f"Trying to find message {message_id} in channels")
-                found = False
-                for channel in ctx.guild.text_channels:
-                    print(f"Searching channel: {channel.name}")
-                    try:
-                        message = await channel.fetch_message(int(message_id))
-                        if message:
-                            link = f"https://discord.com/channels/{ctx.guild.id}/{channel.id}/{message.id}"
-                            await ctx.send(f"Market {market_id} ({title}): {link}")
-                            found = True
-                            break
-                    except discord.NotFound:
-                        continue
-                
-                if not found:
-                    # Get recreation info
-                    recreation_info = await get_market_recreation_info(cursor, market_id)
-                    await ctx.send(
-                        f"Market {market_id} ({title}) exists but the message couldn't be found.\n"
-                        f"Please use !createmarket to recreate it if needed.\n\n{recreation_info}"
-                    )
+                    continue
             
-        except Exception as e:
-            print(f"Error finding market: {str(e)}")
-            # Get recreation info even on error
-            recreation_info = await get_market_recreation_info(cursor, market_id)
-            await ctx.send(
-                f"Error finding market message: {str(e)}\n\n"
-                f"Market {market_id} ({title}) info for recreation:\n{recreation_info}"
-            )
+            if not found:
+                # Get recreation info
+                recreation_info = await get_market_recreation_info(market_id)
+                await ctx.send(
+                    f"Market {market_id} ({title}) exists but the message couldn't be found.\n"
+                    f"Please use !createmarket to recreate it if needed.\n\n{recreation_info}"
+                )
+        
+    except Exception as e:
+        print(f"Error finding market: {str(e)}")
+        # Get recreation info even on error
+        recreation_info = await get_market_recreation_info(market_id)
+        await ctx.send(
+            f"Error finding market message: {str(e)}\n\n"
+            f"Market {market_id} ({title}) info for recreation:\n{recreation_info}"
+        )
+
+def format_my_bet(bet, users):
+    """Format one row of the !mybets query from the caller's side"""
+    bet_id, title, outcome, risk, win, opponent_id, bet_type, opponent_name = bet
+    text = (
+        f"**Bet ID {bet_id}**\n"
+        f"Market: {title}\n"
+        f"Outcome: {outcome}\n"
+        f"You Risk: {format_money(risk)} to Win: {format_money(win)}\n"
+    )
+    if bet_type == 'offer':
+        return text + "\n"
+    
+    if not opponent_name:
+        opponent = users[int(opponent_id)]
+        opponent_name = opponent.name if opponent else "Unknown User"
+    return f"{text}Against: {opponent_name}\n\n"
 
 @bot.command(name='mybets')
 async def my_bets(ctx):
@@ -576,118 +704,82 @@ async def my_bets(ctx):
     """
     user_id = str(ctx.author.id)
     
-    with bot.db.get_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Get user's open offers
-        cursor.execute('''
-            SELECT 
-                bo.bet_id,
-                m.title,
-                bo.outcome,
-                bo.offer_amount,
-                bo.ask_amount,
-                'offer' as bet_type
-            FROM bet_offers bo
-            JOIN markets m ON bo.market_id = m.market_id
-            WHERE bo.bettor_id = ? AND bo.status = 'open'
-        ''', (user_id,))
-        
-        open_offers = cursor.fetchall()
-        
-        # Get bets where user is the original bettor
-        cursor.execute('''
-            SELECT 
-                bo.bet_id,
-                m.title,
-                bo.outcome,
-                bo.offer_amount as your_risk,
-                bo.ask_amount as your_win,
-                ab.acceptor_id,
-                'original_bettor' as bet_type
-            FROM bet_offers bo
-            JOIN markets m ON bo.market_id = m.market_id
-            JOIN accepted_bets ab ON bo.bet_id = ab.bet_id
-            WHERE bo.bettor_id = ? AND bo.status = 'accepted' AND ab.status = 'active'
-        ''', (user_id,))
-        
-        bets_as_bettor = cursor.fetchall()
+    # Open offers, bets as the original bettor and bets as the acceptor,
+    # tagged by bet_type and fetched in a single statement
+    bets = await bot.db.fetchall('''
+        SELECT 
+            bo.bet_id,
+            m.title,
+            bo.outcome,
+            bo.offer_amount,
+            bo.ask_amount,
+            NULL as opponent_id,
+            'offer' as bet_type,
+            NULL as opponent_name
+        FROM bet_offers bo
+        JOIN markets m ON bo.market_id = m.market_id
+        WHERE bo.bettor_id = ? AND bo.status = 'open'
+        
+        UNION ALL
         
-        # Get bets where user is the acceptor
-        cursor.execute('''
-            SELECT 
-                bo.bet_id,
-                m.title,
-                bo.outcome,
-                bo.ask_amount as your_risk,
-                bo.offer_amount as your_win,
-                bo.bettor_id,
-                'acceptor' as bet_type
-            FROM bet_offers bo
-            JOIN markets m ON bo.market_id = m.market_id
-            JOIN accepted_bets ab ON bo.bet_id = ab.bet_id
-            WHERE ab.acceptor_id = ? AND bo.status = 'accepted' AND ab.status = 'active'
-        ''', (user_id,))
+        SELECT 
+            bo.bet_id,
+            m.title,
+            bo.outcome,
+            bo.offer_amount as your_risk,
+            bo.ask_amount as your_win,
+            ab.acceptor_id,
+            'original_bettor' as bet_type,
+            ab.acceptor_name
+        FROM bet_offers bo
+        JOIN markets m ON bo.market_id = m.market_id
+        JOIN accepted_bets ab ON bo.bet_id = ab.bet_id
+        WHERE bo.bettor_id = ? AND bo.status = 'accepted' AND ab.status = 'active'
+        
+        UNION ALL
         
-        bets_as_acceptor = cursor.fetchall()
+        SELECT 
+            bo.bet_id,
+            m.title,
+            bo.outcome,
+            bo.ask_amount as your_risk,
+            bo.offer_amount as your_win,
+            bo.bettor_id,
+            'acceptor' as bet_type,
+            bo.bettor_name
+        FROM bet_offers bo
+        JOIN markets m ON bo.market_id = m.market_id
+        JOIN accepted_bets ab ON bo.bet_id = ab.bet_id
+        WHERE ab.acceptor_id = ? AND bo.status = 'accepted' AND ab.status = 'active'
+    ''', (user_id, user_id, user_id))
+    
+    open_offers = [bet for bet in bets if bet['bet_type'] == 'offer']
+    bets_as_bettor = [bet for bet in bets if bet['bet_type'] == 'original_bettor']
+    bets_as_acceptor = [bet for bet in bets if bet['bet_type'] == 'acceptor']
     
     embed = discord.Embed(
         title=f"Betting Activity for {ctx.author.name}",
         color=discord.Color.blue()
     )
     
-    # Add open offers section
-    if open_offers:
-        offers_text = ""
-        for bet_id, title, outcome, offer, ask, _ in open_offers:
-            offers_text += f"**Bet ID {bet_id}**\n"
-            offers_text += f"Market: {title}\n"
-            offers_text += f"Outcome: {outcome}\n"
-            offers_text += f"You Risk: ${offer} to Win: ${ask}\n\n"
-        
-        embed.add_field(
-            name="📊 Your Open Offers",
-            value=offers_text or "No open offers",
-            inline=False
-        )
-    
-    # Add active bets where user is original bettor
-    if bets_as_bettor:
-        bettor_text = ""
-        for bet_id, title, outcome, risk, win, acceptor_id, _ in bets_as_bettor:
-            acceptor = await bot.fetch_user(int(acceptor_id))
-            acceptor_name = acceptor.name if acceptor else "Unknown User"
-            
-            bettor_text += f"**Bet ID {bet_id}**\n"
-            bettor_text += f"Market: {title}\n"
-            bettor_text += f"Outcome: {outcome}\n"
-            bettor_text += f"You Risk: ${risk} to Win: ${win}\n"
-            bettor_text += f"Against: {acceptor_name}\n\n"
-        
-        embed.add_field(
-            name="🎲 Your Active Bets (As Bettor)",
-            value=bettor_text or "No active bets as bettor",
-            inline=False
-        )
+    # Bets made before names were stored still need a lookup
+    users = await bot.fetch_users(
+        [bet['opponent_id'] for bet in bets_as_bettor + bets_as_acceptor if not bet['opponent_name']],
+        ctx.guild
+    )
     
-    # Add active bets where user is acceptor
-    if bets_as_acceptor:
-        acceptor_text = ""
-        for bet_id, title, outcome, risk, win, bettor_id, _ in bets_as_acceptor:
-            bettor = await bot.fetch_user(int(bettor_id))
-            bettor_name = bettor.name if bettor else "Unknown User"
-            
-            acceptor_text += f"**Bet ID {bet_id}**\n"
-            acceptor_text += f"Market: {title}\n"
-            acceptor_text += f"Outcome: {outcome}\n"
-            acceptor_text += f"You Risk: ${risk} to Win: ${win}\n"
-            acceptor_text += f"Against: {bettor_name}\n\n"
-        
-        embed.add_field(
-            name="🎲 Your Active Bets (As Acceptor)",
-            value=acceptor_text or "No active bets as acceptor",
-            inline=False
-        )
+    sections = (
+        ("📊 Your Open Offers", open_offers),
+        ("🎲 Your Active Bets (As Bettor)", bets_as_bettor),
+        ("🎲 Your Active Bets (As Acceptor)", bets_as_acceptor),
+    )
+    for name, section_bets in sections:
+        if section_bets:
+            embed.add_field(
+                name=name,
+                value="".join(format_my_bet(bet, users) for bet in section_bets),
+                inline=False
+            )
     
     if not (open_offers or bets_as_bettor or bets_as_acceptor):
         embed.description = "You have no open offers or active bets."
@@ -698,22 +790,17 @@ async def my_bets(ctx):
 async def noslop(ctx):
     await ctx.send("hey")
 
-@bot.command(name='dennishelp')
-async def dennis_help(ctx):
-   """
-   Show all available commands for Dennis the betting bot
-   Usage: !dennishelp
-   """
-   embed = discord.Embed(
-       title="Dennis Betting Bot Commands 🎲",
-       description="A betting market bot for financial memetic warfare",
-       color=discord.Color.blue()
-   )
-   
-   # Market Creation & Resolution
-   embed.add_field(
-       name="📊 Markets",
-       value="""
+# The help text never changes, so build its embed once at import time
+HELP_EMBED = discord.Embed(
+    title="Dennis Betting Bot Commands 🎲",
+    description="A betting market bot for financial memetic warfare",
+    color=discord.Color.blue()
+)
+
+# Market Creation & Resolution
+HELP_EMBED.add_field(
+    name="📊 Markets",
+    value="""
 **!createmarket** `<question>? <option1>, <option2>, ...`
 Create a new betting market
 Example: `!createmarket Will it rain tomorrow? Yes, No`
@@ -721,14 +808,14 @@ Example: `!createmarket Will it rain tomorrow? Yes, No`
 **!resolvemarket** `<market_id> <winning_outcome>`
 Resolve a market (creator or designated resolver only)
 Example: `!resolvemarket 1 Yes`
-       """,
-       inline=False
-   )
-   
-   # Betting System
-   embed.add_field(
-       name="💰 How Betting Works",
-       value="""
+    """,
+    inline=False
+)
+
+# Betting System
+HELP_EMBED.add_field(
+    name="💰 How Betting Works",
+    value="""
 **Creating Bets**
 1. React with <:dennis:1328277972612026388> on any market
 2. Select which outcome you're betting on
@@ -741,60 +828,66 @@ Example: `!resolvemarket 1 Yes`
 - 📉 Flag bet for bad odds
 - 🤏 Flag bet as too small
 - <:monkaS:814271443327123466> Flag bet as too big
-       """,
-       inline=False
-   )
-   
-   # Market Features
-   embed.add_field(
-       name="⚙️ Market Features",
-       value="""
+    """,
+    inline=False
+)
+
+# Market Features
+HELP_EMBED.add_field(
+    name="⚙️ Market Features",
+    value="""
 **Resolver Settings**
 - React 🇷 to set a different resolver for your market
 
 **Timer Settings**
 - React ⏲️ to set when the market closes
 - Support for duration (24h, 7d) or specific time
-       """,
-       inline=False
-   )
-
-   # Tracking Bets
-   embed.add_field(
-       name="📈 Track Your Bets",
-       value="""
+    """,
+    inline=False
+)
+
+# Tracking Bets
+HELP_EMBED.add_field(
+    name="📈 Track Your Bets",
+    value="""
 **!listbets** `[market_id]`
 List all open bet offers, optionally filtered by market
 Example: `!listbets` or `!listbets 1`
 
 **!mybets**
 Show your open offers and active bets
-       """,
-       inline=False
-   )
-   
-   # Usage Tips
-   embed.add_field(
-       name="💡 Tips",
-       value="""
+    """,
+    inline=False
+)
+
+# Usage Tips
+HELP_EMBED.add_field(
+    name="💡 Tips",
+    value="""
 - When offering a bet, the 'offer' is what you risk and the 'ask' is what you want to win
 - Betting amounts are in dollars ($)
 - You can't accept your own bets
 - Only market creators or designated resolvers can resolve markets
 - Markets can have optional close times
-       """,
-       inline=False
-   )
-
-   embed.add_field(
-       name="🔧",
-       value="**!noslop**",
-       inline=False
-   )
-   
-   embed.set_footer(text="Dennis v2.0 | Boats carried by Claude")
-   
-   await ctx.send(embed=embed)
+    """,
+    inline=False
+)
+
+HELP_EMBED.add_field(
+    name="🔧",
+    value="**!noslop**",
+    inline=False
+)
+
+HELP_EMBED.set_footer(text="Dennis v2.0 | Boats carried by Claude")
+
+@bot.command(name='dennishelp')
+async def dennis_help(ctx):
+   """
+   Show all available commands for Dennis the betting bot
+   Usage: !dennishelp
+   """
+   await ctx.send(embed=HELP_EMBED)
 
 @bot.command(name='rm')
 async def remove_markets(ctx, *market_ids: str):
@@ -816,48 +909,48 @@ async def remove_markets(ctx, *market_ids: str):
         await ctx.send("Invalid market ID format. Please provide numeric IDs.")
         return
     
-    with bot.db.get_connection() as conn:
-        cursor = conn.cursor()
-        
-        try:
-            # Start transaction
-            cursor.execute('BEGIN TRANSACTION')
-            
-            # Delete associated bet offers first (due to foreign key constraints)
-            cursor.execute('''
+    def delete_markets():
+        # One fixed statement per table, run once per market, so the SQL text
+        # never depends on how many IDs were given and stays in the statement cache
+        params = [(market_id,) for market_id in ids_to_remove]
+        with bot.db.transaction() as conn:
+            # Delete accepted bets and bet offers first (due to foreign key constraints)
+            conn.executemany('''
+                DELETE FROM accepted_bets
+                WHERE bet_id IN (
+                    SELECT bet_id FROM bet_offers WHERE market_id = ?
+                )
+            ''', params)
+
+            conn.executemany('''
                 DELETE FROM bet_offers 
-                WHERE market_id IN ({})
-            '''.format(','.join('?' * len(ids_to_remove))), ids_to_remove)
+                WHERE market_id = ?
+            ''', params)
             
             # Delete market outcomes
-            cursor.execute('''
+            conn.executemany('''
                 DELETE FROM market_outcomes 
-                WHERE market_id IN ({})
-            '''.format(','.join('?' * len(ids_to_remove))), ids_to_remove)
+                WHERE market_id = ?
+            ''', params)
             
             # Delete markets
-            cursor.execute('''
+            cursor = conn.executemany('''
                 DELETE FROM markets 
-                WHERE market_id IN ({})
-            '''.format(','.join('?' * len(ids_to_remove))), ids_to_remove)
-            
-            deleted_count = cursor.rowcount
-            
-            # Commit transaction
-            conn.commit()
-            
-            # Remove from active_markets if present
-            for market_data in list(bot.active_markets.values()):
-                if market_data['market_id'] in ids_to_remove:
-                    message_id = market_data.get('message_id')
-                    if message_id:
-                        bot.active_markets.pop(int(message_id), None)
-            
-            await ctx.send(f"Successfully removed {deleted_count} markets.")
+                WHERE market_id = ?
+            ''', params)
             
-        except Exception as e:
-            conn.rollback()
-            await ctx.send(f"Error removing markets: {str(e)}")
+            return cursor.rowcount
+
+    try:
+        deleted_count = await bot.db.run(delete_markets)
+        bot.db.markets_changed()
+        for market_id in ids_to_remove:
+            cancel_countdown(market_id)
+    except Exception as e:
+        await ctx.send(f"Error removing markets: {str(e)}")
+        return
+    
+    await ctx.send(f"Successfully removed {deleted_count} markets.")
 
 # Run the bot
 if __name__ == "__main__":
@@ -3,10 +3,143 @@ import datetime
 import asyncio
 import re
 import pytz
-from views import BetView, OutcomeSelect
-import sqlite3
+from views import BetView
+
+# Hot reaction-path queries, kept as constants so every call reuses the
+# statement compiled into the shared connection's cache
+BET_LOOKUP_SQL = '''
+    SELECT b.bet_id, b.market_id, b.bettor_id, b.outcome, b.offer_amount, b.ask_amount,
+           b.status, b.created_at, b.target_user_id, b.discord_message_id,
+           m.status as market_status, m.thread_id
+    FROM bet_offers b
+    JOIN markets m ON b.market_id = m.market_id
+    WHERE b.bet_id = ?
+'''
+
+# A market's outcomes in the order the market was created with
+OUTCOMES_SQL = 'SELECT outcome_name FROM market_outcomes WHERE market_id = ? ORDER BY outcome_id'
+
+# Finds the market behind a market or bet message; bet_id is NULL when
+# the message is the market's own
+MESSAGE_LOOKUP_SQL = '''
+    SELECT NULL AS bet_id, market_id, title, creator_id, discord_message_id,
+           thread_id, resolver_id, close_time, status
+    FROM markets m
+    WHERE discord_message_id = ?1
+    UNION ALL
+    SELECT b.bet_id, m.market_id, m.title, m.creator_id, m.discord_message_id,
+           m.thread_id, m.resolver_id, m.close_time, m.status
+    FROM bet_offers b
+    JOIN markets m ON b.market_id = m.market_id
+    WHERE b.discord_message_id = ?1
+'''
+
+BETTOR_LOOKUP_SQL = 'SELECT bettor_id FROM bet_offers WHERE bet_id = ?'
+
+# Accepts an open offer only if every acceptance rule holds: the offer is
+# still open, the market is open, the offer's outcome is one of the
+# market's, the acceptor isn't the bettor and, for targeted offers, is the
+# target
+ACCEPT_BET_SQL = '''
+    UPDATE bet_offers
+    SET status = 'accepted'
+    WHERE bet_id = ?
+    AND status = 'open'
+    AND bettor_id != ?
+    AND (target_user_id IS NULL OR target_user_id = ?)
+    AND (SELECT status FROM markets WHERE market_id = bet_offers.market_id) = 'open'
+    AND EXISTS (
+        SELECT 1 FROM market_outcomes
+        WHERE market_id = bet_offers.market_id AND outcome_name = bet_offers.outcome
+    )
+    RETURNING market_id, bettor_id, outcome, offer_amount, ask_amount, target_user_id
+'''
+
+# Inserts an offer only while its market is open and the outcome belongs
+# to it, so the common case needs no separate validation queries
+BET_INSERT_SQL = '''
+    INSERT INTO bet_offers
+    (market_id, bettor_id, outcome, offer_amount, ask_amount, target_user_id, discord_message_id, bettor_name)
+    SELECT ?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8
+    WHERE EXISTS (SELECT 1 FROM markets WHERE market_id = ?1 AND status = 'open')
+    AND EXISTS (SELECT 1 FROM market_outcomes WHERE market_id = ?1 AND outcome_name = ?3)
+    RETURNING bet_id
+'''
+
+BET_EXPLANATION_SQL = '''
+    SELECT b.bet_id, b.market_id, b.bettor_id, b.outcome, b.offer_amount, b.ask_amount,
+           b.status, b.created_at, b.target_user_id, b.discord_message_id,
+           m.status as market_status, m.thread_id, m.title
+    FROM bet_offers b
+    JOIN markets m ON b.market_id = m.market_id
+    WHERE b.bet_id = ?
+'''
+
+# Market timers as users type them: a duration like '3d12h30m', or a time
+DURATION_RE = re.compile(r'^(?:(\d+)d)?(?:(\d+)h)?(?:(\d+)m)?$')
+DEADLINE_FORMAT = '%Y-%m-%d %H:%M'
+
+# Running countdown task for each market with a close time, by market ID
+countdown_tasks = {}
+
+# Dollar amounts as users type them: optional $, up to two decimal places
+AMOUNT_RE = re.compile(r'^\s*\$?(\d{1,9})(?:\.(\d{1,2}))?\s*$')
+
+def to_cents(amount):
+    """Parse a dollar amount typed by a user into integer cents"""
+    match = AMOUNT_RE.match(amount)
+    if not match:
+        raise ValueError(f"'{amount}' is not a dollar amount")
+    dollars, cents = match.groups()
+    return int(dollars) * 100 + int((cents or '0').ljust(2, '0'))
+
+def format_money(cents):
+    """Format integer cents as a dollar amount"""
+    return f"${cents / 100:.2f}"
+
+# Server emoji the bot reacts with
+DENNIS_EMOJI_ID = 1328277972612026388
+MONKAS_EMOJI_ID = 814271443327123466
+
+# Reaction menus, in the order they appear under market and bet messages
+MARKET_REACTION_EMOJIS = ("<:dennis:1328277972612026388>", "🇷", "⏲️", "🆘")
+BET_REACTION_EMOJIS = ("✅", "❌", "❔", "📉", "🤏", "<:monkaS:814271443327123466>", "🆘")
+
+async def add_reactions(message, emojis):
+    """Add reactions one at a time, so they show up in the order given.
+
+    A reaction that can't be added (say, a server emoji that was deleted)
+    is skipped rather than failing the rest of the menu.
+    """
+    for emoji in emojis:
+        try:
+            await message.add_reaction(emoji)
+        except discord.HTTPException as e:
+            print(f"Could not add reaction {emoji}: {e}")
+
+def cancel_countdown(market_id):
+    """Stop a market's countdown, if it has one, once its deadline no longer matters"""
+    task = countdown_tasks.pop(market_id, None)
+    if task:
+        task.cancel()
+
+def fetch_with_outcomes(db, sql, params):
+    """Run a market lookup and list the market's outcomes on the same reader.
+
+    Returns (row, outcomes), or (None, []) if the lookup finds nothing.
+    Blocking; call it through db.run.
+    """
+    with db.get_connection() as conn:
+        row = conn.execute(sql, params).fetchone()
+        if row is None:
+            return None, []
+        return row, [r['outcome_name'] for r in conn.execute(OUTCOMES_SQL, (row['market_id'],))]
 
 class Market:
+    # A Market is built for every handled reaction, so skip the per-instance dict
+    __slots__ = ('id', 'title', 'options', 'creator_id', 'message_id', 'thread_id',
+                 'resolver_id', 'close_time', 'status', 'db')
+
     def __init__(self, id, title, options, creator_id, message_id=None, 
                  thread_id=None, resolver_id=None, close_time=None, status='open'):
         self.id = id
@@ -23,25 +156,44 @@ class Market:
     @classmethod
     async def create(cls, db, title, options, creator_id):
         """Create a new market in the database and return a Market object"""
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                'INSERT INTO markets (title, description, creator_id) VALUES (?, ?, ?)',
-                (title, title, str(creator_id))
-            )
-            market_id = cursor.lastrowid
-            
-            for option in options:
-                cursor.execute(
+        def insert_market():
+            with db.transaction() as conn:
+                market_id = conn.execute(
+                    'INSERT INTO markets (title, creator_id) VALUES (?, ?)',
+                    (title, str(creator_id))
+                ).lastrowid
+                
+                conn.executemany(
                     'INSERT INTO market_outcomes (market_id, outcome_name) VALUES (?, ?)',
-                    (market_id, option)
+                    [(market_id, option) for option in options]
                 )
-            conn.commit()
+                return market_id
             
+        market_id = await db.run(insert_market)
+        db.markets_changed()
         market = cls(market_id, title, options, creator_id)
         market.db = db
         return market
 
+    @classmethod
+    async def from_message(cls, db, message_id):
+        """Load the market behind a market or bet message.
+
+        Returns (market, bet_id). bet_id is None for the market's own
+        message, and both are None if the message isn't a market or bet.
+        """
+        row, options = await db.run(fetch_with_outcomes, db, MESSAGE_LOOKUP_SQL, (str(message_id),))
+        if row is None:
+            return None, None
+
+        market = cls(
+            row['market_id'], row['title'], options, row['creator_id'],
+            message_id=row['discord_message_id'], thread_id=row['thread_id'],
+            resolver_id=row['resolver_id'], close_time=row['close_time'], status=row['status']
+        )
+        market.db = db
+        return market, row['bet_id']
+
     async def create_message(self, channel, creator_name):
         """Create and send the market message, create thread, and add reactions"""
         embed = discord.Embed(title=self.title, color=discord.Color.green())
@@ -52,16 +204,15 @@ class Market:
         message = await channel.send(embed=embed)
         self.message_id = message.id
         
-        await message.add_reaction("<:dennis:1328277972612026388>")
-        await message.add_reaction("🇷")
-        await message.add_reaction("⏲️")
-        await message.add_reaction("🆘")
-        
-        # Create thread
-        thread = await channel.create_thread(
-            name=f"Market {self.id}: {self.title[:50]}{'...' if len(self.title) > 50 else ''}",
-            message=message,
-            type=discord.ChannelType.public_thread
+        # Create thread while the reactions go on; the reactions stay in order
+        # among themselves, but nothing else has to wait for them
+        thread, _ = await asyncio.gather(
+            channel.create_thread(
+                name=f"Market {self.id}: {self.title[:50]}{'...' if len(self.title) > 50 else ''}",
+                message=message,
+                type=discord.ChannelType.public_thread
+            ),
+            add_reactions(message, MARKET_REACTION_EMOJIS)
         )
         self.thread_id = thread.id
         
@@ -69,13 +220,10 @@ class Market:
         await thread.send("https://tenor.com/view/memeplex-sol-remilia-remilio-milady-gif-17952083022135309581")
         
         # Update database
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                'UPDATE markets SET discord_message_id = ?, thread_id = ? WHERE market_id = ?',
-                (str(self.message_id), str(self.thread_id), self.id)
-            )
-            conn.commit()
+        await self.db.execute(
+            'UPDATE markets SET discord_message_id = ?, thread_id = ? WHERE market_id = ?',
+            (str(self.message_id), str(self.thread_id), self.id)
+        )
 
         return message, thread
 
@@ -85,8 +233,12 @@ class Market:
             await message.channel.send("Only the market creator can set the resolver.")
             return
 
+        if self.status != 'open':
+            await message.channel.send("This market is no longer open.", delete_after=10)
+            return
+
         # Get the thread from the stored thread_id
-        thread = message.guild.get_thread(int(self.thread_id)) if self.thread_id else None
+        thread = await self.get_thread(message.guild)
         if not thread:
             await message.channel.send("Error: Could not find the market thread.")
             return
@@ -100,21 +252,17 @@ class Market:
             response = await bot.wait_for('message', check=check, timeout=30.0)
             resolver = response.mentions[0]
             
-            with self.db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE markets
-                    SET resolver_id = ?
-                    WHERE market_id = ?
-                ''', (str(resolver.id), self.id))
-                conn.commit()
+            await self.db.execute('''
+                UPDATE markets
+                SET resolver_id = ?
+                WHERE market_id = ?
+            ''', (str(resolver.id), self.id))
             
             self.resolver_id = resolver.id
             # Send confirmation to the thread instead of the main channel
             await thread.send(f"{resolver.mention} has been set as the resolver for this market.")
             
-            await response.delete()
-            await prompt_msg.delete()
+            await self._cleanup_messages([response, prompt_msg])
             
         except asyncio.TimeoutError:
             await message.channel.send("Timed out waiting for resolver selection.")
@@ -126,8 +274,12 @@ class Market:
             await message.channel.send("Only the market creator can set the timer.")
             return
 
+        if self.status != 'open':
+            await message.channel.send("This market is no longer open.", delete_after=10)
+            return
+
         # Get the thread
-        thread = message.guild.get_thread(int(self.thread_id)) if self.thread_id else None
+        thread = await self.get_thread(message.guild)
         if not thread:
             await message.channel.send("Error: Could not find the market thread.")
             return
@@ -147,52 +299,39 @@ class Market:
             
             # Parse the time input
             time_str = response.content.lower().strip()
-            deadline = None
+            now = datetime.datetime.now()
             
             # Try parsing as duration
-            duration_pattern = re.compile(r'^(\d+d)?(\d+h)?(\d+m)?$')
-            if duration_match := duration_pattern.match(time_str):
-                days = 0
-                hours = 0
-                minutes = 0
-                if duration_match.group(1):
-                    days = int(duration_match.group(1)[:-1])
-                if duration_match.group(2):
-                    hours = int(duration_match.group(2)[:-1])
-                if duration_match.group(3):
-                    minutes = int(duration_match.group(3)[:-1])
-                    
-                deadline = datetime.datetime.now() + datetime.timedelta(days=days, hours=hours, minutes=minutes)
+            if duration_match := DURATION_RE.match(time_str):
+                days, hours, minutes = (int(group or 0) for group in duration_match.groups())
+                deadline = now + datetime.timedelta(days=days, hours=hours, minutes=minutes)
             
             # Try parsing as specific time
             else:
                 try:
-                    deadline = datetime.datetime.strptime(time_str, '%Y-%m-%d %H:%M')
+                    deadline = datetime.datetime.strptime(time_str, DEADLINE_FORMAT)
                 except ValueError:
                     await message.channel.send("Invalid time format. Please use either duration (e.g., '24h', '7d', '3d12h30m') or specific time (e.g., '2025-01-20 18:00')")
                     return
 
             # Validate deadline is in the future
-            if deadline <= datetime.datetime.now():
+            if deadline <= now:
                 await message.channel.send("The deadline must be in the future.")
                 return
 
             # Update the database
-            with self.db.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE markets
-                    SET close_time = ?
-                    WHERE market_id = ?
-                ''', (deadline.isoformat(), self.id))
-                conn.commit()
+            await self.db.execute('''
+                UPDATE markets
+                SET close_time = ?
+                WHERE market_id = ?
+            ''', (deadline.isoformat(), self.id))
 
             # Delete user's response and prompt
-            await response.delete()
-            await prompt_msg.delete()
+            await self._cleanup_messages([response, prompt_msg])
             
-            # Schedule the countdown job
-            bot.loop.create_task(self.handle_market_countdown(thread, deadline, bot))
+            # Schedule the countdown job, replacing any earlier deadline's
+            cancel_countdown(self.id)
+            countdown_tasks[self.id] = bot.loop.create_task(self.handle_market_countdown(thread, deadline, bot))
             
             # Convert deadline to Pacific time for display
             pacific = pytz.timezone('America/Los_Angeles')
@@ -206,36 +345,35 @@ class Market:
             await timeout_msg.delete()
 
     async def handle_market_countdown(self, thread, deadline, bot):
-        """Handle countdown and notifications for market closing"""
-        while True:
-            now = datetime.datetime.now()
-            if now >= deadline:
-                # Close the market
-                with self.db.get_connection() as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        UPDATE markets
-                        SET status = 'closed'
-                        WHERE market_id = ?
-                    ''', (self.id,))
-                    conn.commit()
-                
-                await thread.send(f"🔒 This market is now closed for betting!")
-                break
-            
-            # Send reminder at 1 hour remaining
-            time_remaining = deadline - now
-            if datetime.timedelta(hours=1) <= time_remaining <= datetime.timedelta(hours=1, minutes=1):
+        """Sleep until the market's deadline, warning an hour before, then close it"""
+        try:
+            # Send reminder at 1 hour remaining, unless the deadline is closer than that
+            time_remaining = deadline - datetime.datetime.now()
+            if time_remaining > datetime.timedelta(hours=1):
+                await asyncio.sleep((time_remaining - datetime.timedelta(hours=1)).total_seconds())
                 await thread.send(f"⚠️ This market closes in 1 hour!")
             
-            await asyncio.sleep(60)  # Check every minute
+            await asyncio.sleep(max(0, (deadline - datetime.datetime.now()).total_seconds()))
+            
+            # Close the market, unless it was resolved before the deadline
+            cursor = await self.db.execute('''
+                UPDATE markets
+                SET status = 'closed'
+                WHERE market_id = ? AND status = 'open'
+            ''', (self.id,))
+            if cursor.rowcount == 0:
+                return
+            self.db.markets_changed()
+            
+            await thread.send(f"🔒 This market is now closed for betting!")
+        finally:
+            if countdown_tasks.get(self.id) is asyncio.current_task():
+                del countdown_tasks[self.id]
 
     async def handle_bet_offer_reaction(self, message, user, bot):
         """Handle the dennis emoji reaction to create a bet offer"""
-        messages_to_delete = []
-        
         # Get the thread
-        thread = message.guild.get_thread(int(self.thread_id)) if self.thread_id else None
+        thread = await self.get_thread(message.guild)
         if not thread:
             await message.channel.send("Error: Could not find market thread.", delete_after=10)
             return
@@ -252,118 +390,73 @@ class Market:
             color=discord.Color.blue()
         )
         bet_embed.add_field(
-            name="Step 1: Choose your option",
-            value="Use the dropdown menu below to select your outcome",
+            name="Choose your option",
+            value="Use the dropdown menu below to select your outcome, then fill in the form",
             inline=False
         )
        
         view = BetView(self.to_dict(), user)  # Convert market to dict for compatibility
         prompt_msg = await message.channel.send(embed=bet_embed, view=view)
-        messages_to_delete.append(prompt_msg)
        
         await view.wait()
+        await self._cleanup_messages([prompt_msg])
        
-        if view.selected_option is None:
+        if view.interaction is None:
             await message.channel.send("Bet creation timed out.", delete_after=10)
-            await self._cleanup_messages(messages_to_delete)
             return
            
         selected_index = int(view.selected_option)
         selected_option = self.options[selected_index]  # Use self.options instead of dict access
-
-        # Target user prompt - still in main channel
-        target_embed = discord.Embed(
-            title="Create Bet",
-            description=f"Selected: {selected_option}",
-            color=discord.Color.blue()
-        )
-        target_embed.add_field(
-            name="Step 2: Target User (Optional)",
-            value="Mention a user to offer this bet to them specifically, or type 'skip' to offer to anyone",
-            inline=False
-        )
-        await prompt_msg.edit(embed=target_embed, view=None)
+        followup = view.interaction.followup
 
         try:
-            target_msg = await self._get_user_response(message, user, bot)
-            messages_to_delete.append(target_msg)
-            target_user = None
-            if target_msg.content.lower() != 'skip' and len(target_msg.mentions) > 0:
-                target_user = target_msg.mentions[0]
-           
-            # Amount prompt
-            amount_embed = discord.Embed(
-                title="Create Bet",
-                description=f"Selected: {selected_option}",
-                color=discord.Color.blue()
-            )
-            amount_embed.add_field(
-                name="Step 3: Risk Amount",
-                value="How much would you like to risk? (in $)",
-                inline=False
-            )
-            await prompt_msg.edit(embed=amount_embed)
-           
-            amount_msg = await self._get_user_response(message, user, bot)
-            messages_to_delete.append(amount_msg)
-            offer_amount = float(amount_msg.content)
-           
-            # Winnings prompt
-            winnings_embed = discord.Embed(
-                title="Create Bet",
-                description=f"Selected: {selected_option}\nRisk Amount: ${offer_amount}",
-                color=discord.Color.blue()
-            )
-            winnings_embed.add_field(
-                name="Step 4: Desired Winnings",
-                value="How much would you like to win? (in $)",
-                inline=False
-            )
-            await prompt_msg.edit(embed=winnings_embed)
-           
-            winnings_msg = await self._get_user_response(message, user, bot)
-            messages_to_delete.append(winnings_msg)
-            ask_amount = float(winnings_msg.content)
-           
-            # Create bet in database and thread
-            bet_id, bet_msg = await self._create_bet(
-                user=user,
-                selected_option=selected_option,
-                offer_amount=offer_amount,
-                ask_amount=ask_amount,
-                target_user=target_user,
-                thread=thread,
-                bot=bot
-            )
+            target_user = await self._resolve_target(message.guild, view.target_text)
+            offer_amount = to_cents(view.risk_text)
+            ask_amount = to_cents(view.winnings_text)
+        except ValueError as e:
+            await followup.send(f"Invalid input: {str(e)}. Bet creation cancelled.", ephemeral=True)
+            return
 
-            if bet_id:
-                # Add to active bets dict
-                bot.active_bets = getattr(bot, 'active_bets', {})
-                bot.active_bets[bet_msg.id] = bet_id
-                
-                # Update market stats if needed
-                await self.update_stats()
+        # Create bet in database and thread
+        bet_id, bet_msg = await self._create_bet(
+            user=user,
+            selected_option=selected_option,
+            offer_amount=offer_amount,
+            ask_amount=ask_amount,
+            target_user=target_user,
+            thread=thread,
+            bot=bot
+        )
 
-        except ValueError as e:
-            await message.channel.send(f"Invalid input: {str(e)}. Bet creation cancelled.", delete_after=10)
-        except asyncio.TimeoutError:
-            await message.channel.send("Bet creation timed out.", delete_after=10)
-        finally:
-            await self._cleanup_messages(messages_to_delete)
+        if bet_id:
+            await followup.send(f"Bet offer {bet_id} posted in {thread.mention}.", ephemeral=True)
+        else:
+            await followup.send("Bet offer was not placed.", ephemeral=True)
 
-    async def _get_user_response(self, message, user, bot, timeout=60.0):
-        """Helper method to get a response from user in the main channel"""
-        def check(m):
-            return m.author == user and m.channel == message.channel
-        return await bot.wait_for('message', check=check, timeout=timeout)
+    @staticmethod
+    async def _resolve_target(guild, text):
+        """Resolve the optional target typed into the bet form to a member"""
+        text = (text or '').strip()
+        if not text or text.lower() == 'skip':
+            return None
+
+        # Accept a mention, a raw user ID or a username
+        user_id = text.strip('<@!>')
+        if user_id.isdigit():
+            try:
+                return guild.get_member(int(user_id)) or await guild.fetch_member(int(user_id))
+            except discord.NotFound:
+                raise ValueError(f"no member with ID {user_id}")
+
+        member = guild.get_member_named(text.lstrip('@'))
+        if member is None:
+            raise ValueError(f"could not find user '{text}'")
+        return member
 
     async def _cleanup_messages(self, messages):
-        """Helper method to clean up prompt messages"""
-        for msg in messages:
-            try:
-                await msg.delete()
-            except:
-                pass
+        """Helper method to clean up prompt messages, deleting them all at once"""
+        # return_exceptions: a message that's already gone shouldn't stop the rest
+        await asyncio.gather(*(msg.delete() for msg in messages), return_exceptions=True)
 
     async def _create_bet(self, user, selected_option, offer_amount, ask_amount, target_user, thread, bot):
         """Helper method to create bet in database and thread"""
@@ -372,8 +465,8 @@ class Market:
             title=f"{user} offering {selected_option} on: {self.title}",
             color=discord.Color.green()
         )
-        final_embed.add_field(name="Risking", value=f"${offer_amount}", inline=True)
-        final_embed.add_field(name="To Win", value=f"${ask_amount}", inline=True)
+        final_embed.add_field(name="Risking", value=format_money(offer_amount), inline=True)
+        final_embed.add_field(name="To Win", value=format_money(ask_amount), inline=True)
         final_embed.add_field(name="Bet ID", value="Pending...", inline=True)
         final_embed.add_field(name="Market ID:", value=self.id, inline=True)
         final_embed.add_field(name="Help: 🆘", value="", inline=False)
@@ -382,259 +475,191 @@ class Market:
         bet_msg = await thread.send(embed=final_embed)
         
         # Insert into database
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO bet_offers 
-                (market_id, bettor_id, outcome, offer_amount, ask_amount, target_user_id, discord_message_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (self.id, str(user.id), selected_option, 
-                  offer_amount, ask_amount, str(target_user.id) if target_user else None, 
-                  str(bet_msg.id)))
-            bet_id = cursor.lastrowid
-            conn.commit()
-
-        # Update embed with bet ID and add reactions
+        def insert_bet():
+            with self.db.transaction() as conn:
+                return conn.execute(BET_INSERT_SQL, (
+                    self.id, str(user.id), selected_option,
+                    offer_amount, ask_amount, str(target_user.id) if target_user else None,
+                    str(bet_msg.id), user.name
+                )).fetchone()
+
+        inserted = await self.db.run(insert_bet)
+
+        if not inserted:
+            # Slow path: work out why the insert was refused
+            market = await self.db.fetchone('SELECT status FROM markets WHERE market_id = ?', (self.id,))
+            await bet_msg.delete()
+            if market and market['status'] != 'open':
+                await thread.send(f"{user.mention} This market closed before your bet was placed.")
+            else:
+                await thread.send(f"{user.mention} Invalid market or outcome, bet not placed.")
+            return None, None
+
+        bet_id = inserted['bet_id']
+
+        # Update embed with bet ID
         final_embed.set_field_at(2, name="Bet ID", value=bet_id, inline=True)
         if target_user:
             final_embed.add_field(name="Offered To", value=target_user.mention, inline=False)
-        await bet_msg.edit(embed=final_embed)
-
-        # Add reactions
-        for reaction in ["✅", "❌", "❔", "📉", "🤏", "<:monkaS:814271443327123466>", "🆘"]:
-            await bet_msg.add_reaction(reaction)
+        # Edit and react at the same time
+        await asyncio.gather(
+            bet_msg.edit(embed=final_embed),
+            add_reactions(bet_msg, BET_REACTION_EMOJIS)
+        )
 
         return bet_id, bet_msg
 
     async def handle_bet_acceptance(self, message, user, bet_id):
         """Handle ✅ reaction to accept a bet"""
         print(f"Starting bet acceptance for bet_id {bet_id}")
-        
-        # Get bet info from database
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-            print(f"Fetching bet info from database...")
-            cursor.execute('''
-                SELECT b.*, m.status as market_status, m.thread_id
-                FROM bet_offers b
-                JOIN markets m ON b.market_id = m.market_id
-                WHERE b.bet_id = ?
-            ''', (bet_id,))
-            bet = cursor.fetchone()
-            print(f"Raw bet data type: {type(bet)}")
-            print(f"Raw bet data: {bet}")
 
+        # Get thread
+        thread = await self.get_thread(message.guild)
+        print(f"Retrieved thread object: {thread}")
+        if not thread:
+            await message.channel.send("Error: Could not find market thread.", delete_after=10)
+            return
+
+        def accept():
+            with self.db.transaction() as conn:
+                # Validate and flip the offer to accepted in one statement
+                if conn.execute(ACCEPT_BET_SQL, (bet_id, str(user.id), str(user.id))).fetchone():
+                    conn.execute('''
+                        INSERT INTO accepted_bets 
+                        (bet_id, acceptor_id, acceptor_name)
+                        VALUES (?, ?, ?)
+                    ''', (bet_id, str(user.id), user.name))
+                    return True, None
+
+                # Slow path: look the bet up again only to explain the failure
+                return False, conn.execute(BET_LOOKUP_SQL, (bet_id,)).fetchone()
+
+        accepted, bet = await self.db.run(accept)
+
+        if not accepted:
             if not bet:
                 print("Bet not found in database")
                 await message.channel.send("Error: Bet not found.", delete_after=10)
                 return
 
-            # Unpack tuple into named variables for clarity
-            bet_id, market_id, bettor_id, outcome, offer_amount, ask_amount, status, created_at, target_user_id, discord_message_id, market_status, thread_id = bet
-            
-            # Get thread
-            thread = message.guild.get_thread(int(thread_id)) if thread_id else None
-            print(f"Retrieved thread object: {thread}")
-            if not thread:
-                await message.channel.send("Error: Could not find market thread.", delete_after=10)
-                return
-
-            try:
-                print(f"Validating bet acceptance...")
-                print(f"Bet status: {status}")
-                print(f"Market status: {market_status}")
-                print(f"Bettor ID: {bettor_id}")
-                print(f"Target user ID: {target_user_id}")
-                print(f"User trying to accept: {user.id}")
-
-                # Validate bet can be accepted
-                if status != 'open':
-                    await thread.send(f"{user.mention} This bet is no longer open for acceptance.")
-                    return
+            if bet['status'] != 'open':
+                await thread.send(f"{user.mention} This bet is no longer open for acceptance.")
+            elif bet['market_status'] != 'open':
+                await thread.send(f"{user.mention} This market is closed.")
+            elif str(user.id) == bet['bettor_id']:
+                await thread.send(f"{user.mention} You cannot accept your own bet.")
+            elif bet['target_user_id'] is not None and bet['target_user_id'] != str(user.id):
+                await thread.send(f"{user.mention} This bet was offered to a specific user.")
+            else:
+                await thread.send(f"{user.mention} This bet's outcome is not part of the market.")
+            return
 
-                if market_status != 'open':
-                    await thread.send(f"{user.mention} This market is closed.")
-                    return
+        print("Accepted bet and inserted accepted_bets record")
 
-                if str(user.id) == bettor_id:
-                    await thread.send(f"{user.mention} You cannot accept your own bet.")
-                    return
+        try:
+            print("Updating embed...")
+            embed = (await message.fetch()).embeds[0]
+            embed.color = discord.Color.gold()
+            embed.add_field(
+                name="Status", 
+                value=f"Accepted by {user.mention}",
+                inline=False
+            )
+            await message.edit(embed=embed)
+            print("Updated embed")
 
-                if target_user_id and str(user.id) != target_user_id:
-                    await thread.send(f"{user.mention} This bet was offered to a specific user.")
-                    return
+            print("Clearing reactions...")
+            await asyncio.gather(*(message.clear_reaction(reaction) for reaction in ["✅", "❌"]))
+            print("Cleared reactions")
 
-                print("All validations passed, proceeding with acceptance...")
+            await thread.send(f"🤝 Bet {bet_id} has been accepted by {user.mention}!")
+            print("Sent confirmation message")
 
-                # Create accepted bet record and update bet status
-                cursor.execute('''
-                    INSERT INTO accepted_bets 
-                    (bet_id, acceptor_id)
-                    VALUES (?, ?)
-                ''', (bet_id, str(user.id)))
-                print("Inserted accepted_bets record")
-                
-                cursor.execute('''
-                    UPDATE bet_offers
-                    SET status = 'accepted'
-                    WHERE bet_id = ?
-                ''', (bet_id,))
-                print("Updated bet_offers status")
-                
-                conn.commit()
-                print("Committed database changes")
-
-                print("Updating embed...")
-                embed = message.embeds[0]
-                embed.color = discord.Color.gold()
-                embed.add_field(
-                    name="Status", 
-                    value=f"Accepted by {user.mention}",
-                    inline=False
-                )
-                await message.edit(embed=embed)
-                print("Updated embed")
-
-                print("Clearing reactions...")
-                for reaction in ["✅", "❌"]:
-                    await message.clear_reaction(reaction)
-                print("Cleared reactions")
-
-                await thread.send(f"🤝 Bet {bet_id} has been accepted by {user.mention}!")
-                print("Sent confirmation message")
-
-            except Exception as e:
-                print(f"Error during bet acceptance: {str(e)}")
-                await thread.send(f"Error accepting bet: {str(e)}")
-                conn.rollback()
-                raise  # Re-raise to see full traceback in logs
+        except Exception as e:
+            print(f"Error during bet acceptance: {str(e)}")
+            await thread.send(f"Error accepting bet: {str(e)}")
+            raise  # Re-raise to see full traceback in logs
     
     async def handle_bet_cancellation(self, message, user, bet_id):
         """Handle ❌ reaction to cancel a bet"""
         print(f"Starting bet cancellation for bet_id {bet_id}")
         
-        # Get bet info from database
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-            print(f"Fetching bet info from database...")
-            cursor.execute('''
-                SELECT b.*, m.status as market_status, m.thread_id
-                FROM bet_offers b
-                JOIN markets m ON b.market_id = m.market_id
-                WHERE b.bet_id = ?
-            ''', (bet_id,))
-            bet = cursor.fetchone()
-            print(f"Raw bet data type: {type(bet)}")
-            print(f"Raw bet data: {bet}")
-
-            if not bet:
-                print("Bet not found in database")
-                await message.channel.send("Error: Bet not found.", delete_after=10)
-                return
-
-            # Unpack tuple into named variables for clarity
-            bet_id, market_id, bettor_id, outcome, offer_amount, ask_amount, status, created_at, target_user_id, discord_message_id, market_status, thread_id = bet
-            
-            # Get thread
-            thread = message.guild.get_thread(int(thread_id)) if thread_id else None
-            print(f"Retrieved thread object: {thread}")
-            if not thread:
-                await message.channel.send("Error: Could not find market thread.", delete_after=10)
-                return
-
-            try:
-                print(f"Validating bet cancellation...")
-                print(f"Bet status: {status}")
-                print(f"Bettor ID: {bettor_id}")
-                print(f"User trying to cancel: {user.id}")
+        # Get thread
+        thread = await self.get_thread(message.guild)
+        print(f"Retrieved thread object: {thread}")
+        if not thread:
+            await message.channel.send("Error: Could not find market thread.", delete_after=10)
+            return
 
-                # Only bettor can cancel
-                if str(user.id) != bettor_id:
+        try:
+            # Cancel only if the user owns the bet and it is still open
+            cursor = await self.db.execute('''
+                UPDATE bet_offers
+                SET status = 'cancelled'
+                WHERE bet_id = ? AND bettor_id = ? AND status = 'open'
+            ''', (bet_id, str(user.id)))
+
+            if cursor.rowcount == 0:
+                # Slow path: look the bet up only to explain the failure
+                bet = await self.db.fetchone(BET_LOOKUP_SQL, (bet_id,))
+                if not bet:
+                    print("Bet not found in database")
+                    await thread.send("Error: Bet not found.")
+                elif str(user.id) != bet['bettor_id']:
                     await thread.send(f"{user.mention} Only the bet creator can cancel this bet.")
-                    return
-
-                # Can only cancel open bets
-                if status != 'open':
+                else:
                     await thread.send(f"{user.mention} This bet can no longer be cancelled.")
-                    return
-
-                print("All validations passed, proceeding with cancellation...")
-                
-                # Update bet status
-                cursor.execute('''
-                    UPDATE bet_offers
-                    SET status = 'cancelled'
-                    WHERE bet_id = ?
-                ''', (bet_id,))
-                print("Updated bet_offers status")
-                
-                conn.commit()
-                print("Committed database changes")
-
-                print("Updating embed...")
-                embed = message.embeds[0]
-                embed.color = discord.Color.red()
-                embed.add_field(
-                    name="Status", 
-                    value="Cancelled by creator",
-                    inline=False
-                )
-                await message.edit(embed=embed)
-                print("Updated embed")
+                return
+            print("Updated bet_offers status")
+
+            print("Updating embed...")
+            embed = (await message.fetch()).embeds[0]
+            embed.color = discord.Color.red()
+            embed.add_field(
+                name="Status", 
+                value="Cancelled by creator",
+                inline=False
+            )
+            await message.edit(embed=embed)
+            print("Updated embed")
 
-                print("Clearing reactions...")
-                for reaction in ["✅", "❌"]:
-                    await message.clear_reaction(reaction)
-                print("Cleared reactions")
+            print("Clearing reactions...")
+            await asyncio.gather(*(message.clear_reaction(reaction) for reaction in ["✅", "❌"]))
+            print("Cleared reactions")
 
-                await thread.send(f"❌ Bet {bet_id} has been cancelled.")
-                print("Sent confirmation message")
+            await thread.send(f"❌ Bet {bet_id} has been cancelled.")
+            print("Sent confirmation message")
 
-            except Exception as e:
-                print(f"Error during bet cancellation: {str(e)}")
-                await thread.send(f"Error cancelling bet: {str(e)}")
-                conn.rollback()
-                raise  # Re-raise to see full traceback in logs
+        except Exception as e:
+            print(f"Error during bet cancellation: {str(e)}")
+            await thread.send(f"Error cancelling bet: {str(e)}")
+            raise  # Re-raise to see full traceback in logs
 
     async def handle_bet_explanation(self, message, user, bet_id):
         """Handle ❔ reaction to explain a bet's odds and outcomes"""
         print(f"Starting bet explanation for bet_id {bet_id}")
         
         # Get bet info from database
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-            print(f"Fetching bet info from database...")
-            cursor.execute('''
-                SELECT b.*, m.status as market_status, m.thread_id, m.title
-                FROM bet_offers b
-                JOIN markets m ON b.market_id = m.market_id
-                WHERE b.bet_id = ?
-            ''', (bet_id,))
-            bet = cursor.fetchone()
+        print(f"Fetching bet info from database...")
+        bet, outcomes = await self.db.run(fetch_with_outcomes, self.db, BET_EXPLANATION_SQL, (bet_id,))
 
-            if not bet:
-                print("Bet not found in database")
-                await message.channel.send("Error: Bet not found.", delete_after=10)
-                return
+        if not bet:
+            print("Bet not found in database")
+            await message.channel.send("Error: Bet not found.", delete_after=10)
+            return
 
-            # Unpack tuple into named variables
-            bet_id, market_id, bettor_id, outcome, offer_amount, ask_amount, status, created_at, target_user_id, discord_message_id, market_status, thread_id, title = bet
+        # Read the columns this handler needs by name
+        title = bet['title']
+        bettor_id, target_user_id, outcome = bet['bettor_id'], bet['target_user_id'], bet['outcome']
+        offer_amount, ask_amount = bet['offer_amount'], bet['ask_amount']
+        
+        # Get thread
+        thread = await self.get_thread(message.guild)
+        print(f"Retrieved thread object: {thread}")
+        if not thread:
+            await message.channel.send("Error: Could not find market thread.", delete_after=10)
+            return
             
-            # Get thread
-            thread = message.guild.get_thread(int(thread_id)) if thread_id else None
-            print(f"Retrieved thread object: {thread}")
-            if not thread:
-                await message.channel.send("Error: Could not find market thread.", delete_after=10)
-                return
-                
-            # Get all possible outcomes for this market
-            cursor.execute('''
-                SELECT outcome_name 
-                FROM market_outcomes 
-                WHERE market_id = ?
-            ''', (market_id,))
-            outcomes = [row[0] for row in cursor.fetchall()]
-
         # Create explanation embed
         embed = discord.Embed(
             title=f"Bet #{bet_id} Explained",
@@ -646,13 +671,14 @@ class Market:
         bettor_mention = f"<@{bettor_id}>"
         target_mention = "anyone" if not target_user_id else f"<@{target_user_id}>"
         
-        # Explain what happens for each outcome
-        explanation = "If accepted:\n"
+        # Explain what happens for each outcome; every outcome is either the
+        # bettor's pick or not, so both results are formatted once up front
+        win_result = f"{bettor_mention} wins {format_money(ask_amount)}, acceptor loses {format_money(ask_amount)}"
+        lose_result = f"{bettor_mention} loses {format_money(offer_amount)}, acceptor wins {format_money(offer_amount)}"
+        lines = ["If accepted:\n"]
         for possible_outcome in outcomes:
-            if possible_outcome == outcome:
-                explanation += f"- If \"{possible_outcome}\": {bettor_mention} wins ${ask_amount}, acceptor loses ${ask_amount}\n"
-            else:
-                explanation += f"- If \"{possible_outcome}\": {bettor_mention} loses ${offer_amount}, acceptor wins ${offer_amount}\n"
+            result = win_result if possible_outcome == outcome else lose_result
+            lines.append(f"- If \"{possible_outcome}\": {result}\n")
         
         # Add equity explanation based on whether it's a bribe/gift
         if ask_amount == 0:
@@ -662,7 +688,8 @@ class Market:
         else:
             equity_needed = (ask_amount / (ask_amount + offer_amount)) * 100
             equity_explanation = f"For this bet to be EV0, you need {equity_needed:.1f}% equity."
-        explanation += f"\n{equity_explanation}"
+        lines.append(f"\n{equity_explanation}")
+        explanation = "".join(lines)
         
         embed.add_field(
             name="Pot odds", 
@@ -694,7 +721,7 @@ class Market:
 
     async def handle_bet_react_help(self, message):
         """Handle 🆘 reaction to show bet reaction help"""
-        thread = message.guild.get_thread(int(self.thread_id)) if self.thread_id else None
+        thread = await self.get_thread(message.guild)
         if not thread:
             await message.channel.send("Error: Could not find market thread.", delete_after=10)
             return
@@ -716,28 +743,29 @@ class Market:
         await help_msg.delete()
         
     async def handle_bet_reaction_feedback(self, message, user, emoji, bet_id):
-        """Handle feedback reactions (📉, 🤏, monkaS) to notify bettor"""
+        """Handle feedback reactions (📉, 🤏, monkaS) to notify bettor
+
+        emoji is the reaction's dispatch key: the character for 📉 and 🤏,
+        MONKAS_EMOJI_ID for monkaS.
+        """
         # The message should be in a thread already
         thread = message.channel
         
         # Get bettor ID from database
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT bettor_id FROM bet_offers WHERE bet_id = ?', (bet_id,))
-            result = cursor.fetchone()
+        result = await self.db.fetchone(BETTOR_LOOKUP_SQL, (bet_id,))
+        
+        if not result:
+            print("Could not find bet in database")
+            return
             
-            if not result:
-                print("Could not find bet in database")
-                return
-                
-            bettor_id = result[0]
+        bettor_id = result['bettor_id']
         
         # Determine the feedback message based on emoji
         if emoji == "📉":
             feedback = "thinks your bet has bad odds"
         elif emoji == "🤏":
             feedback = "thinks your bet amount is too small"
-        elif emoji == "<:monkaS:814271443327123466>":
+        elif emoji == MONKAS_EMOJI_ID:
             feedback = "thinks your bet amount is too big"
         else:
             return  # Exit if invalid emoji
@@ -745,35 +773,21 @@ class Market:
         # Send notification in thread with proper mention
         await thread.send(f"<@{bettor_id}>, {user.mention} {feedback}.")
 
-    async def update_stats(self):
-        """Update market stats in the embed"""
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get count and volume of open bets
-            cursor.execute('''
-                SELECT COUNT(*), SUM(offer_amount)
-                FROM bet_offers 
-                WHERE market_id = ? AND status = 'open'
-            ''', (self.id,))
-            open_count, open_volume = cursor.fetchone()
-            
-            # Get count and volume of accepted bets
-            cursor.execute('''
-                SELECT COUNT(*), SUM(bo.offer_amount)
-                FROM bet_offers bo
-                JOIN accepted_bets ab ON bo.bet_id = ab.bet_id
-                WHERE bo.market_id = ? AND ab.status = 'active'
-            ''', (self.id,))
-            accepted_count, accepted_volume = cursor.fetchone()
-            
-            # Handle None values from SUM
-            open_volume = open_volume or 0
-            accepted_volume = accepted_volume or 0
-            total_volume = open_volume + accepted_volume
+    async def get_thread(self, guild):
+        """Find the market's thread, asking the API only if it isn't cached"""
+        if not self.thread_id:
+            return None
+        thread = guild.get_thread(int(self.thread_id))
+        if thread is None:
+            # Archived threads drop out of the cache
+            try:
+                thread = await guild.fetch_channel(int(self.thread_id))
+            except discord.HTTPException:
+                return None
+        return thread
 
     def to_dict(self):
-        """Convert to dict for bot.active_markets"""
+        """Convert to the market_data dict BetView expects"""
         return {
             'market_id': self.id,
             'options': self.options,
@@ -781,16 +795,3 @@ class Market:
             'thread_id': self.thread_id,
             'creator_id': self.creator_id
         }
-
-    @classmethod
-    def from_dict(cls, data, db):
-        """Create Market instance from bot.active_markets data"""
-        market = cls(
-            id=data['market_id'],
-            title=data['title'],
-            options=data['options'],
-            creator_id=data['creator_id'],
-            thread_id=data.get('thread_id')
-        )
-        market.db = db
-        return market
@@ -1,6 +1,35 @@
 import discord
 from discord import SelectOption
-from discord.ui import Select, View
+from discord.ui import Modal, Select, TextInput, View
+
+class BetModal(Modal, title="Create Bet"):
+    target = TextInput(
+        label="Offer to (optional)",
+        placeholder="User ID or username, leave blank to offer to anyone",
+        required=False
+    )
+    risk = TextInput(label="Risk amount ($)", placeholder="10.00", max_length=13)
+    winnings = TextInput(label="Desired winnings ($)", placeholder="15.00", max_length=13)
+
+    def __init__(self, bet_view):
+        super().__init__()
+        self.bet_view = bet_view
+
+    async def on_submit(self, interaction: discord.Interaction):
+        # The form can outlive its view; by then nothing is waiting to create the bet
+        if self.bet_view.is_finished():
+            await interaction.response.send_message(
+                "This bet form expired. React again to start a new bet.", ephemeral=True
+            )
+            return
+
+        # Acknowledge now; the bet is created after the view stops
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        self.bet_view.target_text = self.target.value
+        self.bet_view.risk_text = self.risk.value
+        self.bet_view.winnings_text = self.winnings.value
+        self.bet_view.interaction = interaction
+        self.bet_view.stop()
 
 class OutcomeSelect(Select):
     def __init__(self, options):
@@ -17,16 +46,21 @@ class OutcomeSelect(Select):
         )
     
     async def callback(self, interaction: discord.Interaction):
-        # Store the selected value and stop the view
+        # Store the selected value and ask for the rest in a single form
         self.view.selected_option = self.values[0]
-        self.view.stop()
+        await interaction.response.send_modal(BetModal(self.view))
 
 class BetView(View):
     def __init__(self, market_data, user):
-        super().__init__(timeout=60)
+        super().__init__(timeout=180)
         self.market_data = market_data
         self.user = user
         self.selected_option = None
+        # Filled in by BetModal once the form is submitted
+        self.target_text = None
+        self.risk_text = None
+        self.winnings_text = None
+        self.interaction = None
         
         # Add the select menu
         self.add_item(OutcomeSelect(market_data['options']))
@@ -34,3 +68,49 @@ class BetView(View):
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         # Only allow the user who reacted to use this menu
         return interaction.user.id == self.user.id            
+
+class PageView(View):
+    def __init__(self, user, render_page, has_more):
+        super().__init__(timeout=120)
+        self.user = user
+        # Coroutine taking a page number and returning (embed, has_more)
+        self.render_page = render_page
+        self.page = 0
+        # Set once the view is sent, so the buttons can be disabled on timeout
+        self.message = None
+        self._update_buttons(has_more)
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+    async def _show(self, interaction, page):
+        # Rendering may have to fetch users, which can outlast Discord's
+        # three second window for a response, so acknowledge first
+        await interaction.response.defer()
+        embed, has_more = await self.render_page(page)
+        self.page = page
+        self._update_buttons(has_more)
+        await interaction.edit_original_response(embed=embed, view=self)
+
+    async def on_timeout(self):
+        # Expired buttons would only fail the interaction, so grey them out
+        self.previous_page.disabled = True
+        self.next_page.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+    def _update_buttons(self, has_more):
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not has_more
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        # Only the user who ran the command can turn pages
+        return interaction.user.id == self.user.id